@@ -10,13 +10,14 @@ __author__ = "Mountain Capital Partners"
 
 # Import main classes and functions for easy access
 from .config import DatabaseConfig, RESORT_MAPPING, STORED_PROCEDURES, CandidateColumns
-from .db_connection import DatabaseConnection, create_connection
+from .db_connection import ConnectionPool, DatabaseConnection, connection_pool, create_connection
 from .stored_procedures import (
     StoredProcedures,
     execute_revenue_proc,
     execute_payroll_proc,
     execute_visits_proc,
-    execute_weather_proc
+    execute_weather_proc,
+    fetch_concurrently
 )
 
 from .analysis_engine import AnalysisEngine
@@ -29,7 +30,9 @@ __all__ = [
     'CandidateColumns',
     
     # Connection
+    'ConnectionPool',
     'DatabaseConnection',
+    'connection_pool',
     'create_connection',
     
     # Stored Procedures
@@ -38,6 +41,7 @@ __all__ = [
     'execute_payroll_proc',
     'execute_visits_proc',
     'execute_weather_proc',
+    'fetch_concurrently',
     
     # Analytics
     'AnalysisEngine',
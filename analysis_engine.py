@@ -6,27 +6,84 @@ Mountain Capital Partners - Ski Resort Data Analysis
 import os
 import pandas as pd
 import xlsxwriter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, Any, Union, List, Tuple, Set, Optional
 
-from db_connection import DatabaseConnection
-from stored_procedures import StoredProcedures
+from stored_procedures import fetch_concurrently
 from utils import DateRangeCalculator, DataUtils
-from config import CandidateColumns, VISITS_DEPT_CODE_MAPPING
+from config import CandidateColumns, VISITS_DEPT_CODE_MAPPING, DEBUG_EXPORT_FORMAT, VERBOSE, MAX_EXPORT_WORKERS
+
+
+# Worker pool for parallel debug exports, shared by every engine and started on first use
+_export_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_export_executor() -> ProcessPoolExecutor:
+    """Return the shared debug export pool, starting it on first use"""
+    global _export_executor
+    if _export_executor is None:
+        _export_executor = ProcessPoolExecutor(max_workers=MAX_EXPORT_WORKERS)
+    return _export_executor
 
 
 class AnalysisEngine:
     """Analysis engine for generating comprehensive ski resort reports and insights"""
     
-    def __init__(self, output_dir: str = "reports"):
+    DEBUG_EXPORT_FORMATS = ('xlsx', 'parquet')
+    
+    # Cell formats for the DMR report sheet, added to each report workbook by _build_formats
+    REPORT_FORMATS = {
+        'header': {'bold': True, 'align': 'center', 'bg_color': '#D3D3D3', 'border': 1, 'text_wrap': True},
+        'row_header': {'bold': True, 'border': 1},
+        'data': {'border': 1, 'num_format': '#,##0.00'},
+        'snow': {'border': 1, 'num_format': '0.0'},
+        'percent': {'border': 1, 'num_format': '0"%"'}
+    }
+    
+    # Cell formats for the 'Data' sheet of debug stored procedure exports
+    DATA_SHEET_FORMATS = {
+        'header': {'bold': True, 'bg_color': '#D3D3D3', 'border': 1},
+        'data': {'border': 1}
+    }
+    
+    def __init__(self, output_dir: str = "reports", debug_export_format: str = DEBUG_EXPORT_FORMAT,
+                 verbose: bool = VERBOSE):
+        if debug_export_format not in self.DEBUG_EXPORT_FORMATS:
+            raise ValueError(f"debug_export_format must be one of {self.DEBUG_EXPORT_FORMATS}, got '{debug_export_format}'")
+        self.debug_export_format = debug_export_format
+        self.verbose = verbose
         self.output_dir = output_dir
-        if not os.path.exists(output_dir):
+        try:
             os.makedirs(output_dir)
             print(f"✓ Created output directory: {output_dir}")
+        except FileExistsError:
+            pass
         current_file_dir = os.path.dirname(os.path.abspath(__file__))
         self.insights_dir = os.path.join(current_file_dir, "insights")
-        if not os.path.exists(self.insights_dir):
-            os.makedirs(self.insights_dir)
+        os.makedirs(self.insights_dir, exist_ok=True)
+        # Most recent (report date, current flag) and its calculator, reused across a resort batch
+        self._date_calculator_key: Optional[Tuple[datetime, bool]] = None
+        self._date_calculator: Optional[DateRangeCalculator] = None
+
+    def _get_date_calculator(self, report_date: datetime, is_current: bool) -> DateRangeCalculator:
+        """Reuse the last DateRangeCalculator while consecutive resorts share a (report date, current flag)."""
+        cache_key = (report_date, is_current)
+        if self._date_calculator_key != cache_key:
+            self._date_calculator = DateRangeCalculator(report_date, is_current_date=is_current, use_exact_date=not is_current)
+            self._date_calculator_key = cache_key
+        return self._date_calculator
+
+    def _log_enabled(self, debug_log_file: Any = None) -> bool:
+        """Whether calculation breakdowns will be printed or written anywhere."""
+        return bool(self.verbose or debug_log_file)
+
+    def _emit_log(self, log_message: str, debug_log_file: Any = None):
+        """Print a calculation breakdown when verbose and append it to the debug log, if any."""
+        if self.verbose:
+            print(log_message, end='')
+        if debug_log_file:
+            debug_log_file.write(log_message)
 
     def _process_snow(self, data_store: Dict, range_names: List[str]) -> Dict:
         processed_snow = {name: {'snow_24hrs': 0.0, 'base_depth': 0.0} for name in range_names}
@@ -36,9 +93,9 @@ class AnalysisEngine:
                 snow_col = DataUtils.get_col(dataframe, CandidateColumns.snow)
                 base_col = DataUtils.get_col(dataframe, CandidateColumns.baseDepth)
                 if snow_col: 
-                    processed_snow[range_name]['snow_24hrs'] = DataUtils.normalize_value(dataframe[snow_col].sum())
+                    processed_snow[range_name]['snow_24hrs'] = DataUtils.normalize_value(DataUtils.normalize_series(dataframe[snow_col]).sum())
                 if base_col: 
-                    processed_snow[range_name]['base_depth'] = DataUtils.normalize_value(dataframe[base_col].sum())
+                    processed_snow[range_name]['base_depth'] = DataUtils.normalize_value(DataUtils.normalize_series(dataframe[base_col]).sum())
         return processed_snow
 
     def _process_visits_dataframe(self, dataframe: pd.DataFrame, all_locations: Set[str] = None) -> Dict[str, float]:
@@ -51,22 +108,55 @@ class AnalysisEngine:
         visits_col = DataUtils.get_col(dataframe, CandidateColumns.visits)
         if location_col:
             if visits_col:
-                grouped = dataframe.groupby(location_col)[visits_col].sum()
+                grouped = DataUtils.normalize_series(dataframe[visits_col]).groupby(dataframe[location_col], sort=False).sum()
             else:
-                grouped = dataframe.groupby(location_col).size()
-            for location, value in grouped.items():
-                location_str = str(location)
-                processed_visits[location_str] = DataUtils.normalize_value(value)
-                all_locations.add(location_str)
+                grouped = dataframe.groupby(location_col, sort=False).size()
+            grouped.index = grouped.index.map(str)
+            processed_visits = DataUtils.normalize_series(grouped).to_dict()
+            all_locations.update(processed_visits)
         return processed_visits
 
     def _process_visits(self, data_store: Dict, range_names: List[str], all_locations: Set[str]) -> Dict:
         processed_visits = {name: {} for name in range_names}
+        # Stack every range into one frame so a single groupby covers all of them
+        range_frames = []
         for range_name in range_names:
             dataframe = data_store[range_name]['visits']
-            processed_visits[range_name] = self._process_visits_dataframe(dataframe, all_locations)
+            if dataframe.empty:
+                continue
+            location_col = DataUtils.get_col(dataframe, CandidateColumns.location)
+            visits_col = DataUtils.get_col(dataframe, CandidateColumns.visits)
+            if location_col:
+                range_frames.append(pd.DataFrame({
+                    'range_name': range_name,
+                    'location': dataframe[location_col],
+                    # Without a visits column each row counts as one visit, as in groupby().size()
+                    'visits': DataUtils.normalize_series(dataframe[visits_col]) if visits_col else 1.0
+                }))
+        if not range_frames:
+            return processed_visits
+        stacked = pd.concat(range_frames, ignore_index=True)
+        # Range and location labels repeat on every row; categorical keys group on integer codes
+        stacked['range_name'] = stacked['range_name'].astype('category')
+        stacked['location'] = stacked['location'].astype('category')
+        grouped = stacked.groupby(['range_name', 'location'], sort=False, observed=True)['visits'].sum()
+        totals = DataUtils.normalize_series(grouped)
+        locations = totals.index.get_level_values('location').map(str)
+        all_locations.update(locations)
+        for range_name, location, value in zip(totals.index.get_level_values('range_name'), locations, totals.tolist()):
+            processed_visits[range_name][location] = value
         return processed_visits
 
+    def _merge_titles(self, department_to_title: Dict, dept_codes: pd.Series, titles: pd.Series) -> None:
+        """Add the first non-null title of each non-empty department code not already in department_to_title."""
+        has_title = (dept_codes != '') & titles.notna()
+        first_titles = pd.DataFrame({
+            'code': dept_codes[has_title],
+            'title': titles[has_title].astype(str).str.strip()
+        }).drop_duplicates('code')
+        for dept_code, title in zip(first_titles['code'], first_titles['title']):
+            department_to_title.setdefault(dept_code, title)
+
     def _process_revenue_dataframe(self, dataframe: pd.DataFrame, department_to_title: Dict, 
                                    all_departments: Set[str] = None) -> Dict[str, float]:
         processed_revenue = {}
@@ -82,304 +172,296 @@ class AnalysisEngine:
             if len(numeric_cols) > 0:
                 revenue_col = numeric_cols[-1]
         if code_col and revenue_col:
-            for _, row in dataframe.iterrows():
-                dept_code = DataUtils.trim_dept_code(row[code_col])
-                if dept_code and title_col in dataframe.columns and pd.notna(row[title_col]):
-                    if dept_code not in department_to_title:
-                        department_to_title[dept_code] = str(row[title_col]).strip()
-            grouped = dataframe.groupby(code_col)[revenue_col].sum()
-            for dept, value in grouped.items():
-                dept_str = DataUtils.trim_dept_code(dept)
+            raw_codes = dataframe[code_col]
+            dept_codes = DataUtils.trim_dept_codes(raw_codes)
+            if title_col in dataframe.columns:
+                self._merge_titles(department_to_title, dept_codes, dataframe[title_col])
+            has_code = raw_codes.notna()
+            # Categorical keys let groupby hash integer codes instead of department strings
+            department_keys = dept_codes[has_code].astype('category')
+            revenue_values = DataUtils.normalize_series(dataframe.loc[has_code, revenue_col])
+            grouped = revenue_values.groupby(department_keys, observed=True).sum()
+            for dept_str, value in grouped.items():
                 processed_revenue[dept_str] = DataUtils.normalize_value(value)
                 all_departments.add(dept_str)
-                if dept_str not in department_to_title:
-                    department_to_title[dept_str] = dept_str
+                department_to_title.setdefault(dept_str, dept_str)
         return processed_revenue
 
     def _process_revenue(self, data_store: Dict, range_names: List[str], all_departments: Set[str], department_to_title: Dict, debug_log_file: Any = None) -> Dict:
         processed_revenue = {name: {} for name in range_names}
+        log_enabled = self._log_enabled(debug_log_file)
         for range_name in range_names:
-            log_message = f"\n{'='*80}\n  💰 REVENUE CALCULATION BREAKDOWN - {range_name}\n"
-            log_message += f"{'='*80}\n"
-            
             dataframe = data_store[range_name]['revenue']
             
             if dataframe.empty:
-                log_message += "  ⚠️  No revenue data available\n"
                 processed_revenue[range_name] = {}
-            else:
-                code_col = DataUtils.get_col(dataframe, CandidateColumns.departmentCode) or 'department'
-                title_col = DataUtils.get_col(dataframe, CandidateColumns.departmentTitle) or 'DepartmentTitle'
-                revenue_col = DataUtils.get_col(dataframe, CandidateColumns.revenue) or 'revenue'
-                if not revenue_col:
-                    numeric_cols = dataframe.select_dtypes(include=['number']).columns
-                    if len(numeric_cols) > 0:
-                        revenue_col = numeric_cols[-1]
-                
-                revenue_rows_by_dept = {}
-                if code_col and revenue_col:
-                    for _, row in dataframe.iterrows():
-                        dept_code = DataUtils.trim_dept_code(row[code_col])
-                        if not dept_code:
-                            continue
-                        revenue_value = DataUtils.normalize_value(row[revenue_col])
-                        if dept_code not in revenue_rows_by_dept:
-                            revenue_rows_by_dept[dept_code] = []
-                        revenue_rows_by_dept[dept_code].append({
-                            'dept_code_raw': row[code_col],
-                            'revenue': revenue_value
-                        })
-                
-                processed_revenue[range_name] = self._process_revenue_dataframe(dataframe, department_to_title, all_departments)
-                
-                # Log revenue details for each department
-                for dept_code in sorted(list(processed_revenue[range_name].keys())):
-                    dept_title = department_to_title.get(dept_code, dept_code)
-                    revenue_total = processed_revenue[range_name][dept_code]
-                    log_message += f"\n  📁 Department: {dept_code} ({dept_title})\n     {'─'*76}\n"
-                    log_message += "     📋 Revenue Rows:\n"
-                    rows = revenue_rows_by_dept.get(dept_code, [])
-                    for idx, r in enumerate(rows, 1):
-                        log_message += f"          Row {idx}: DeptCode='{r['dept_code_raw']}', Revenue=${r['revenue']:,.2f}\n"
-                    log_message += f"        • Aggregated Revenue: ${revenue_total:,.2f}\n"
-                    log_message += f"     ✅ FINAL REVENUE TOTAL: ${revenue_total:,.2f}\n"
+                if log_enabled:
+                    self._emit_log(
+                        f"\n{'='*80}\n  💰 REVENUE CALCULATION BREAKDOWN - {range_name}\n{'='*80}\n"
+                        f"  ⚠️  No revenue data available\n\n{'='*80}\n",
+                        debug_log_file
+                    )
+                continue
             
-            log_message += f"\n{'='*80}\n"
-            print(log_message, end='')
-            if debug_log_file:
-                debug_log_file.write(log_message)
-                debug_log_file.flush()
+            processed_revenue[range_name] = self._process_revenue_dataframe(dataframe, department_to_title, all_departments)
+            if not log_enabled:
+                continue
+            
+            code_col = DataUtils.get_col(dataframe, CandidateColumns.departmentCode) or 'department'
+            revenue_col = DataUtils.get_col(dataframe, CandidateColumns.revenue) or 'revenue'
+            revenue_rows_by_dept = {}
+            raw_codes = dataframe[code_col]
+            for raw_code, dept_code, revenue_value in zip(raw_codes, DataUtils.trim_dept_codes(raw_codes),
+                                                          DataUtils.normalize_series(dataframe[revenue_col])):
+                if not dept_code:
+                    continue
+                if dept_code not in revenue_rows_by_dept:
+                    revenue_rows_by_dept[dept_code] = []
+                revenue_rows_by_dept[dept_code].append((raw_code, revenue_value))
+            
+            # Log revenue details for each department
+            log_lines = [f"\n{'='*80}\n  💰 REVENUE CALCULATION BREAKDOWN - {range_name}\n{'='*80}\n"]
+            for dept_code in sorted(processed_revenue[range_name].keys()):
+                dept_title = department_to_title.get(dept_code, dept_code)
+                revenue_total = processed_revenue[range_name][dept_code]
+                log_lines.append(f"\n  📁 Department: {dept_code} ({dept_title})\n     {'─'*76}\n")
+                log_lines.append("     📋 Revenue Rows:\n")
+                for idx, (raw_code, revenue_value) in enumerate(revenue_rows_by_dept.get(dept_code, []), 1):
+                    log_lines.append(f"          Row {idx}: DeptCode='{raw_code}', Revenue=${revenue_value:,.2f}\n")
+                log_lines.append(f"        • Aggregated Revenue: ${revenue_total:,.2f}\n")
+                log_lines.append(f"     ✅ FINAL REVENUE TOTAL: ${revenue_total:,.2f}\n")
+            log_lines.append(f"\n{'='*80}\n")
+            self._emit_log(''.join(log_lines), debug_log_file)
         
         return processed_revenue
 
+    def _calculate_contract_wages(self, payroll_df: pd.DataFrame, department_to_title: Dict,
+                                  all_departments: Set[str], collect_rows: bool = False) -> Tuple[Dict[str, float], Dict[str, List[Tuple]]]:
+        """
+        Calculate contract (hourly) wages per department from punch-level payroll rows
+        
+        Each punch is paid hours * rate + dollar amount, using the hours column when it
+        is positive and otherwise the punch start/end duration (never negative).
+        
+        Args:
+            payroll_df: Contract payroll DataFrame
+            department_to_title: Department code to title map, filled in for unseen codes
+            all_departments: Set of department codes, updated in place
+            collect_rows: Also return the per-punch values for the breakdown log
+        
+        Returns:
+            Tuple of (wages by department code, punch rows by department code as
+            (start, end, rate, working hours, hours column, dollar amount, wage) tuples)
+        """
+        calculated_wages = {}
+        contract_rows_by_dept = {}
+        if payroll_df.empty:
+            return calculated_wages, contract_rows_by_dept
+        code_col = DataUtils.get_col(payroll_df, CandidateColumns.departmentCode) or 'department'
+        title_col = DataUtils.get_col(payroll_df, CandidateColumns.departmentTitle)
+        start_col = DataUtils.get_col(payroll_df, CandidateColumns.payrollStartTime)
+        end_col = DataUtils.get_col(payroll_df, CandidateColumns.payrollEndTime)
+        rate_col = DataUtils.get_col(payroll_df, CandidateColumns.payrollRate)
+        hours_col = DataUtils.get_col(payroll_df, CandidateColumns.payrollHours)
+        dollar_col = DataUtils.get_col(payroll_df, CandidateColumns.payrollDollarAmount)
+        
+        dept_codes = DataUtils.trim_dept_codes(payroll_df[code_col])
+        has_code = dept_codes != ''
+        if not has_code.any():
+            return calculated_wages, contract_rows_by_dept
+        punches = payroll_df[has_code]
+        dept_codes = dept_codes[has_code]
+        all_departments.update(dept_codes.unique())
+        
+        if title_col:
+            self._merge_titles(department_to_title, dept_codes, punches[title_col])
+        
+        zeros = pd.Series(0.0, index=punches.index)
+        rate = DataUtils.normalize_series(punches[rate_col]) if rate_col else zeros
+        hours_from_col = DataUtils.normalize_series(punches[hours_col]) if hours_col else zeros
+        dollar_amt = DataUtils.normalize_series(punches[dollar_col]) if dollar_col else zeros
+        if start_col and end_col:
+            start_times = DataUtils.to_datetime_series(punches[start_col])
+            end_times = DataUtils.to_datetime_series(punches[end_col])
+            working_hours = ((end_times - start_times).dt.total_seconds() / 3600.0).clip(lower=0.0).fillna(0.0)
+        else:
+            working_hours = zeros
+        billed_hours = hours_from_col.where(hours_from_col > 0, working_hours)
+        wages = DataUtils.normalize_series(billed_hours * rate + dollar_amt)
+        
+        for dept_code, total in wages.groupby(dept_codes.astype('category'), observed=True).sum().items():
+            calculated_wages[dept_code] = DataUtils.normalize_value(total)
+        
+        if collect_rows:
+            start_values = punches[start_col] if start_col else [None] * len(punches)
+            end_values = punches[end_col] if end_col else [None] * len(punches)
+            for dept_code, start, end, r, w_hrs, h_col, d_amt, wage in zip(
+                    dept_codes, start_values, end_values, rate, working_hours, hours_from_col, dollar_amt, wages):
+                if dept_code not in contract_rows_by_dept:
+                    contract_rows_by_dept[dept_code] = []
+                contract_rows_by_dept[dept_code].append((start, end, r, w_hrs, h_col, d_amt, wage))
+        return calculated_wages, contract_rows_by_dept
+
+    def _sum_salary_totals(self, salary_df: pd.DataFrame, department_to_title: Dict) -> Dict[str, float]:
+        """Salary total per trimmed department code, filling in titles for unseen codes."""
+        salary_totals = {}
+        if salary_df.empty:
+            return salary_totals
+        salary_code_column = DataUtils.get_col(salary_df, CandidateColumns.departmentCode)
+        salary_total_column = DataUtils.get_col(salary_df, CandidateColumns.salaryTotal)
+        salary_title_column = DataUtils.get_col(salary_df, CandidateColumns.departmentTitle)
+        dept_codes = DataUtils.trim_dept_codes(salary_df[salary_code_column])
+        for dept, total in zip(dept_codes, DataUtils.normalize_series(salary_df[salary_total_column])):
+            if dept:
+                salary_totals[dept] = total
+        if salary_title_column:
+            self._merge_titles(department_to_title, dept_codes, salary_df[salary_title_column])
+        return salary_totals
+
+    def _sum_history_totals(self, history_df: pd.DataFrame) -> Dict[str, float]:
+        """Historical payroll total per trimmed department code."""
+        history_totals = {}
+        if history_df.empty:
+            return history_totals
+        history_code_column = DataUtils.get_col(history_df, CandidateColumns.departmentCode) or 'department'
+        history_total_column = DataUtils.get_col(history_df, CandidateColumns.historyTotal)
+        dept_codes = DataUtils.trim_dept_codes(history_df[history_code_column])
+        for dept, total in zip(dept_codes, DataUtils.normalize_series(history_df[history_total_column])):
+            if dept:
+                history_totals[dept] = total
+        return history_totals
+
+    def _compute_payroll_for_range(self, range_data: Dict, department_to_title: Dict,
+                                   all_departments: Set[str], collect_rows: bool = False) -> Tuple[Dict, Dict, Dict, Dict]:
+        """
+        Compute the payroll components for one date range
+        
+        Args:
+            range_data: Stored procedure results for the range ('payroll', 'salary_payroll', 'payroll_history')
+            department_to_title: Department code to title map, filled in for unseen codes
+            all_departments: Set of department codes, updated in place
+            collect_rows: Also return the per-punch contract rows for the breakdown log
+        
+        Returns:
+            Tuple of (calculated_wages, salary_totals, history_totals, contract_rows_by_dept)
+        """
+        calculated_wages, contract_rows_by_dept = self._calculate_contract_wages(
+            range_data['payroll'], department_to_title, all_departments, collect_rows=collect_rows
+        )
+        history_totals = self._sum_history_totals(range_data['payroll_history'])
+        salary_totals = self._sum_salary_totals(range_data['salary_payroll'], department_to_title)
+        return calculated_wages, salary_totals, history_totals, contract_rows_by_dept
+
+    def _finalize_payroll(self, calculated_wages: Dict, salary_totals: Dict, history_totals: Dict,
+                          is_actual: bool) -> Dict[str, float]:
+        """Final payroll per department: contract + salary for actual ranges, history for prior year ranges."""
+        final_payroll = {}
+        for dept_code in sorted(set(calculated_wages) | set(salary_totals) | set(history_totals)):
+            if is_actual:
+                contract_total = DataUtils.normalize_value(calculated_wages.get(dept_code, 0.0))
+                salary_total = DataUtils.normalize_value(salary_totals.get(dept_code, 0.0))
+                try:
+                    final_payroll[dept_code] = DataUtils.normalize_value(contract_total + salary_total)
+                except (OverflowError, ValueError, TypeError):
+                    final_payroll[dept_code] = 0.0
+            else:
+                final_payroll[dept_code] = DataUtils.normalize_value(history_totals.get(dept_code, 0.0))
+        return final_payroll
+
+    def _format_payroll_log(self, final_payroll: Dict[str, float], calculated_wages: Dict,
+                            salary_totals: Dict, history_totals: Dict, contract_rows_by_dept: Dict,
+                            is_actual: bool, department_to_title: Dict,
+                            show_history_note: bool = True) -> List[str]:
+        """Per-department breakdown lines for the payroll calculation log (show_history_note: add the actual-range 'History' line)."""
+        log_lines = []
+        for dept_code, final_wage in final_payroll.items():
+            dept_title = department_to_title.get(dept_code, dept_code)
+            log_lines.append(f"\n  📁 Department: {dept_code} ({dept_title})\n     {'─'*76}\n")
+            log_lines.append("     📋 Contract Payroll (Hourly):\n")
+            log_lines.extend(self._format_contract_rows(contract_rows_by_dept.get(dept_code, [])))
+            if is_actual:
+                contract_total = DataUtils.normalize_value(calculated_wages.get(dept_code, 0.0))
+                salary_total = DataUtils.normalize_value(salary_totals.get(dept_code, 0.0))
+                log_lines.append(f"        • Aggregated Contract: ${contract_total:,.2f}\n")
+                log_lines.append(f"        • Salary for Range: ${salary_total:,.2f}\n")
+                if show_history_note:
+                    log_lines.append(f"        • History: (Not used for Actual)\n")
+            else:
+                history_total = DataUtils.normalize_value(history_totals.get(dept_code, 0.0))
+                log_lines.append(f"        • Contract: (Not used for Prior Year)\n")
+                log_lines.append(f"        • Salary: (Not used for Prior Year)\n")
+                log_lines.append(f"        • Historical Total: ${history_total:,.2f}\n")
+            log_lines.append(f"     ✅ FINAL PAYROLL TOTAL: ${final_wage:,.2f}\n")
+        return log_lines
+
     def _process_payroll(self, data_store: Dict, range_names: List[str], is_current_date: bool, 
                          actual_ranges: List[str], processed_revenue: Dict, 
                          all_departments: Set[str], department_to_title: Dict,
                          debug_log_file: Any = None) -> Dict:
         processed_payroll = {name: {} for name in range_names}
+        log_enabled = self._log_enabled(debug_log_file)
         
         for range_name in range_names:
-            log_message = f"\n{'='*80}\n  📊 PAYROLL CALCULATION BREAKDOWN - {range_name}\n"
+            log_lines = [f"\n{'='*80}\n  📊 PAYROLL CALCULATION BREAKDOWN - {range_name}\n"]
             if is_current_date:
-                log_message += "  ⚠️  NOTE: Current date - payroll set to 0 for all departments\n"
-                log_message += f"{'='*80}\n"
+                log_lines.append("  ⚠️  NOTE: Current date - payroll set to 0 for all departments\n")
+                log_lines.append(f"{'='*80}\n")
                 for dept_code in processed_revenue[range_name].keys():
                     processed_payroll[range_name][dept_code] = 0.0
                     all_departments.add(dept_code)
             else:
-                log_message += f"{'='*80}\n"
-                
-                dataframe_payroll = data_store[range_name]['payroll']
-                calculated_wages = {}
-                contract_rows_by_dept = {}
-                
-                if not dataframe_payroll.empty:
-                    code_col = DataUtils.get_col(dataframe_payroll, CandidateColumns.departmentCode) or 'department'
-                    title_col = DataUtils.get_col(dataframe_payroll, CandidateColumns.departmentTitle)
-                    start_col = DataUtils.get_col(dataframe_payroll, CandidateColumns.payrollStartTime)
-                    end_col = DataUtils.get_col(dataframe_payroll, CandidateColumns.payrollEndTime)
-                    rate_col = DataUtils.get_col(dataframe_payroll, CandidateColumns.payrollRate)
-                    hours_col = DataUtils.get_col(dataframe_payroll, CandidateColumns.payrollHours)
-                    dollar_col = DataUtils.get_col(dataframe_payroll, CandidateColumns.payrollDollarAmount)
-                    
-                    for _, row in dataframe_payroll.iterrows():
-                        dept_code = DataUtils.trim_dept_code(row[code_col])
-                        if not dept_code: continue
-                        all_departments.add(dept_code)
-                        
-                        if title_col and pd.notna(row[title_col]) and dept_code not in department_to_title:
-                            department_to_title[dept_code] = str(row[title_col]).strip()
-                        
-                        rate = DataUtils.normalize_value(row[rate_col])
-                        hours_from_col = DataUtils.normalize_value(row[hours_col]) if hours_col else 0
-                        dollar_amt = DataUtils.normalize_value(row[dollar_col]) if dollar_col else 0
-                        
-                        working_hours = 0.0
-                        if pd.notna(row[start_col]) and pd.notna(row[end_col]):
-                            try:
-                                start_time = pd.to_datetime(row[start_col])
-                                end_time = pd.to_datetime(row[end_col])
-                                if pd.notna(start_time) and pd.notna(end_time):
-                                    seconds_diff = (end_time - start_time).total_seconds()
-                                    working_hours = max(0.0, seconds_diff / 3600.0)
-                                    working_hours = DataUtils.normalize_value(working_hours)
-                            except (ValueError, TypeError, OverflowError):
-                                working_hours = 0.0
-                        
-                        try:
-                            if hours_from_col > 0:
-                                wage = (hours_from_col * rate) + dollar_amt
-                            else:
-                                wage = (working_hours * rate) + dollar_amt
-                            wage = DataUtils.normalize_value(wage)
-                        except (OverflowError, ValueError, TypeError):
-                            wage = 0.0
-                            
-                        calculated_wages[dept_code] = DataUtils.normalize_value(
-                            calculated_wages.get(dept_code, 0.0) + wage
-                        )
-                        
-                        if dept_code not in contract_rows_by_dept: contract_rows_by_dept[dept_code] = []
-                        contract_rows_by_dept[dept_code].append({
-                            'start': row[start_col], 'end': row[end_col], 'rate': rate, 
-                            'w_hrs': working_hours, 'h_col': hours_from_col, 'd_amt': dollar_amt, 'wage': wage
-                        })
-
-                dataframe_history = data_store[range_name]['payroll_history']
-                dataframe_salary = data_store[range_name]['salary_payroll']
-                history_totals = {}
-                salary_totals = {}
-                
-                if not dataframe_history.empty:
-                    history_code_column = DataUtils.get_col(dataframe_history, CandidateColumns.departmentCode) or 'department'
-                    history_total_column = DataUtils.get_col(dataframe_history, CandidateColumns.historyTotal)
-                    for _, row in dataframe_history.iterrows():
-                        dept = DataUtils.trim_dept_code(row[history_code_column])
-                        if dept: history_totals[dept] = DataUtils.normalize_value(row[history_total_column])
-                
-                if not dataframe_salary.empty:
-                    salary_code_column = DataUtils.get_col(dataframe_salary, CandidateColumns.departmentCode)
-                    salary_total_column = DataUtils.get_col(dataframe_salary, CandidateColumns.salaryTotal)
-                    salary_title_column = DataUtils.get_col(dataframe_salary, CandidateColumns.departmentTitle)
-                    for _, row in dataframe_salary.iterrows():
-                        dept = DataUtils.trim_dept_code(row[salary_code_column])
-                        if dept: 
-                            salary_totals[dept] = DataUtils.normalize_value(row[salary_total_column])
-                            if salary_title_column and pd.notna(row[salary_title_column]) and dept not in department_to_title:
-                                department_to_title[dept] = str(row[salary_title_column]).strip()
-
-                relevant_depts = set(calculated_wages.keys()) | set(salary_totals.keys()) | set(history_totals.keys())
-                for dept_code in sorted(list(relevant_depts)):
-                    dept_title = department_to_title.get(dept_code, dept_code)
-                    log_message += f"\n  📁 Department: {dept_code} ({dept_title})\n     {'─'*76}\n"
-                    
-                    log_message += "     📋 Contract Payroll (Hourly):\n"
-                    rows = contract_rows_by_dept.get(dept_code, [])
-                    for idx, r in enumerate(rows, 1):
-                        log_message += f"          Row {idx}: Start={r['start']}, End={r['end']}, WHrs={r['w_hrs']:.2f}, HCol={r['h_col']:.2f}, Rate=${r['rate']:.2f}, Dlr=${r['d_amt']:.2f}, Wage=${r['wage']:.2f}\n"
-                    
-                    contract_total = DataUtils.normalize_value(calculated_wages.get(dept_code, 0.0))
-                    salary_total = DataUtils.normalize_value(salary_totals.get(dept_code, 0.0))
-                    history_total = DataUtils.normalize_value(history_totals.get(dept_code, 0.0))
-                    
-                    if range_name in actual_ranges:
-                        try:
-                            final_wage = DataUtils.normalize_value(contract_total + salary_total)
-                        except (OverflowError, ValueError, TypeError):
-                            final_wage = 0.0
-                        log_message += f"        • Aggregated Contract: ${contract_total:,.2f}\n"
-                        log_message += f"        • Salary for Range: ${salary_total:,.2f}\n"
-                        log_message += f"        • History: (Not used for Actual)\n"
-                    else:
-                        final_wage = history_total
-                        log_message += f"        • Contract: (Not used for Prior Year)\n"
-                        log_message += f"        • Salary: (Not used for Prior Year)\n"
-                        log_message += f"        • Historical Total: ${history_total:,.2f}\n"
-                    
-                    processed_payroll[range_name][dept_code] = final_wage
-                    log_message += f"     ✅ FINAL PAYROLL TOTAL: ${final_wage:,.2f}\n"
-                    all_departments.add(dept_code)
+                log_lines.append(f"{'='*80}\n")
+                is_actual = range_name in actual_ranges
+                computed = self._compute_payroll_for_range(
+                    data_store[range_name], department_to_title, all_departments, collect_rows=log_enabled
+                )
+                calculated_wages, salary_totals, history_totals, contract_rows_by_dept = computed
+                processed_payroll[range_name] = self._finalize_payroll(
+                    calculated_wages, salary_totals, history_totals, is_actual
+                )
+                all_departments.update(processed_payroll[range_name])
+                if log_enabled:
+                    log_lines.extend(self._format_payroll_log(
+                        processed_payroll[range_name], *computed, is_actual, department_to_title
+                    ))
 
-            log_message += f"\n{'='*80}\n"
-            print(log_message, end='')
-            if debug_log_file:
-                debug_log_file.write(log_message)
-                debug_log_file.flush()
+            if log_enabled:
+                log_lines.append(f"\n{'='*80}\n")
+                self._emit_log(''.join(log_lines), debug_log_file)
                 
         return processed_payroll
 
+    def _format_contract_rows(self, rows: List[Tuple]) -> List[str]:
+        """Format per-punch contract payroll rows for the calculation breakdown log."""
+        return [
+            f"          Row {idx}: Start={start}, End={end}, WHrs={w_hrs:.2f}, HCol={h_col:.2f}, Rate=${rate:.2f}, Dlr=${d_amt:.2f}, Wage=${wage:.2f}\n"
+            for idx, (start, end, rate, w_hrs, h_col, d_amt, wage) in enumerate(rows, 1)
+        ]
+
     def _process_payroll_actual_dataframes(self, payroll_df: pd.DataFrame, salary_df: pd.DataFrame,
                                            department_to_title: Dict, all_departments: Set[str] = None,
                                            date_label: str = "", debug_log_file: Any = None) -> Dict[str, float]:
         if all_departments is None:
             all_departments = set()
-        log_message = f"\n{'='*80}\n  📊 PAYROLL CALCULATION BREAKDOWN - {date_label}\n"
-        log_message += f"  Method: Actual Ranges (Contract + Salary)\n"
-        log_message += f"{'='*80}\n"
-        processed_payroll = {}
-        calculated_wages = {}
-        contract_rows_by_dept = {}
-        if not payroll_df.empty:
-            code_col = DataUtils.get_col(payroll_df, CandidateColumns.departmentCode) or 'department'
-            title_col = DataUtils.get_col(payroll_df, CandidateColumns.departmentTitle)
-            start_col = DataUtils.get_col(payroll_df, CandidateColumns.payrollStartTime)
-            end_col = DataUtils.get_col(payroll_df, CandidateColumns.payrollEndTime)
-            rate_col = DataUtils.get_col(payroll_df, CandidateColumns.payrollRate)
-            hours_col = DataUtils.get_col(payroll_df, CandidateColumns.payrollHours)
-            dollar_col = DataUtils.get_col(payroll_df, CandidateColumns.payrollDollarAmount)
-            for _, row in payroll_df.iterrows():
-                dept_code = DataUtils.trim_dept_code(row[code_col])
-                if not dept_code:
-                    continue
-                all_departments.add(dept_code)
-                if title_col and pd.notna(row[title_col]) and dept_code not in department_to_title:
-                    department_to_title[dept_code] = str(row[title_col]).strip()
-                rate = DataUtils.normalize_value(row[rate_col])
-                hours_from_col = DataUtils.normalize_value(row[hours_col]) if hours_col else 0
-                dollar_amt = DataUtils.normalize_value(row[dollar_col]) if dollar_col else 0
-                working_hours = 0.0
-                if pd.notna(row[start_col]) and pd.notna(row[end_col]):
-                    try:
-                        start_time = pd.to_datetime(row[start_col])
-                        end_time = pd.to_datetime(row[end_col])
-                        if pd.notna(start_time) and pd.notna(end_time):
-                            seconds_diff = (end_time - start_time).total_seconds()
-                            working_hours = max(0.0, seconds_diff / 3600.0)
-                            working_hours = DataUtils.normalize_value(working_hours)
-                    except (ValueError, TypeError, OverflowError):
-                        working_hours = 0.0
-                try:
-                    if hours_from_col > 0:
-                        wage = (hours_from_col * rate) + dollar_amt
-                    else:
-                        wage = (working_hours * rate) + dollar_amt
-                    wage = DataUtils.normalize_value(wage)
-                except (OverflowError, ValueError, TypeError):
-                    wage = 0.0
-                calculated_wages[dept_code] = DataUtils.normalize_value(
-                    calculated_wages.get(dept_code, 0.0) + wage
-                )
-                if dept_code not in contract_rows_by_dept:
-                    contract_rows_by_dept[dept_code] = []
-                contract_rows_by_dept[dept_code].append({
-                    'start': row[start_col], 'end': row[end_col], 'rate': rate,
-                    'w_hrs': working_hours, 'h_col': hours_from_col, 'd_amt': dollar_amt, 'wage': wage
-                })
-        salary_totals = {}
-        if not salary_df.empty:
-            salary_code_column = DataUtils.get_col(salary_df, CandidateColumns.departmentCode)
-            salary_total_column = DataUtils.get_col(salary_df, CandidateColumns.salaryTotal)
-            salary_title_column = DataUtils.get_col(salary_df, CandidateColumns.departmentTitle)
-            for _, row in salary_df.iterrows():
-                dept = DataUtils.trim_dept_code(row[salary_code_column])
-                if dept:
-                    salary_totals[dept] = DataUtils.normalize_value(row[salary_total_column])
-                    all_departments.add(dept)
-                    if salary_title_column and pd.notna(row[salary_title_column]) and dept not in department_to_title:
-                        department_to_title[dept] = str(row[salary_title_column]).strip()
-        relevant_depts = set(calculated_wages.keys()) | set(salary_totals.keys())
-        for dept_code in sorted(list(relevant_depts)):
-            dept_title = department_to_title.get(dept_code, dept_code)
-            log_message += f"\n  📁 Department: {dept_code} ({dept_title})\n     {'─'*76}\n"
-            log_message += "     📋 Contract Payroll (Hourly):\n"
-            rows = contract_rows_by_dept.get(dept_code, [])
-            for idx, r in enumerate(rows, 1):
-                log_message += f"          Row {idx}: Start={r['start']}, End={r['end']}, WHrs={r['w_hrs']:.2f}, HCol={r['h_col']:.2f}, Rate=${r['rate']:.2f}, Dlr=${r['d_amt']:.2f}, Wage=${r['wage']:.2f}\n"
-            contract_total = DataUtils.normalize_value(calculated_wages.get(dept_code, 0.0))
-            salary_total = DataUtils.normalize_value(salary_totals.get(dept_code, 0.0))
-            log_message += f"        • Aggregated Contract: ${contract_total:,.2f}\n"
-            log_message += f"        • Salary for Range: ${salary_total:,.2f}\n"
-            try:
-                final_wage = DataUtils.normalize_value(contract_total + salary_total)
-            except (OverflowError, ValueError, TypeError):
-                final_wage = 0.0
-            processed_payroll[dept_code] = final_wage
-            log_message += f"     ✅ FINAL PAYROLL TOTAL: ${final_wage:,.2f}\n"
-        log_message += f"\n{'='*80}\n"
-        print(log_message, end='')
-        if debug_log_file:
-            debug_log_file.write(log_message)
-            debug_log_file.flush()
+        log_enabled = self._log_enabled(debug_log_file)
+        log_lines = [
+            f"\n{'='*80}\n  📊 PAYROLL CALCULATION BREAKDOWN - {date_label}\n",
+            f"  Method: Actual Ranges (Contract + Salary)\n",
+            f"{'='*80}\n"
+        ]
+        calculated_wages, contract_rows_by_dept = self._calculate_contract_wages(
+            payroll_df, department_to_title, all_departments, collect_rows=log_enabled
+        )
+        salary_totals = self._sum_salary_totals(salary_df, department_to_title)
+        all_departments.update(salary_totals)
+        processed_payroll = self._finalize_payroll(calculated_wages, salary_totals, {}, is_actual=True)
+        if log_enabled:
+            log_lines.extend(self._format_payroll_log(
+                processed_payroll, calculated_wages, salary_totals, {}, contract_rows_by_dept,
+                True, department_to_title, show_history_note=False
+            ))
+            log_lines.append(f"\n{'='*80}\n")
+            self._emit_log(''.join(log_lines), debug_log_file)
         return processed_payroll
 
     def _process_payroll_prior_year_dataframe(self, history_df: pd.DataFrame,
@@ -387,38 +469,32 @@ class AnalysisEngine:
                                              date_label: str = "", debug_log_file: Any = None) -> Dict[str, float]:
         if all_departments is None:
             all_departments = set()
-        log_message = f"\n{'='*80}\n  📊 PAYROLL CALCULATION BREAKDOWN - {date_label}\n"
-        log_message += f"  Method: Prior Year Ranges (History Only)\n"
-        log_message += f"{'='*80}\n"
+        log_enabled = self._log_enabled(debug_log_file)
+        log_lines = [
+            f"\n{'='*80}\n  📊 PAYROLL CALCULATION BREAKDOWN - {date_label}\n",
+            f"  Method: Prior Year Ranges (History Only)\n",
+            f"{'='*80}\n"
+        ]
         processed_payroll = {}
         if history_df.empty:
-            log_message += "  ⚠️  No payroll history data available\n"
-            log_message += f"\n{'='*80}\n"
-            print(log_message, end='')
-            if debug_log_file:
-                debug_log_file.write(log_message)
-                debug_log_file.flush()
+            if log_enabled:
+                log_lines.append("  ⚠️  No payroll history data available\n")
+                log_lines.append(f"\n{'='*80}\n")
+                self._emit_log(''.join(log_lines), debug_log_file)
             return processed_payroll
-        history_code_column = DataUtils.get_col(history_df, CandidateColumns.departmentCode) or 'department'
-        history_total_column = DataUtils.get_col(history_df, CandidateColumns.historyTotal)
-        for _, row in history_df.iterrows():
-            dept = DataUtils.trim_dept_code(row[history_code_column])
-            if dept:
-                processed_payroll[dept] = DataUtils.normalize_value(row[history_total_column])
-                all_departments.add(dept)
-        for dept_code in sorted(list(processed_payroll.keys())):
-            dept_title = department_to_title.get(dept_code, dept_code)
-            history_total = processed_payroll[dept_code]
-            log_message += f"\n  📁 Department: {dept_code} ({dept_title})\n     {'─'*76}\n"
-            log_message += f"        • Contract: (Not used for Prior Year)\n"
-            log_message += f"        • Salary: (Not used for Prior Year)\n"
-            log_message += f"        • Historical Total: ${history_total:,.2f}\n"
-            log_message += f"     ✅ FINAL PAYROLL TOTAL: ${history_total:,.2f}\n"
-        log_message += f"\n{'='*80}\n"
-        print(log_message, end='')
-        if debug_log_file:
-            debug_log_file.write(log_message)
-            debug_log_file.flush()
+        processed_payroll = self._sum_history_totals(history_df)
+        all_departments.update(processed_payroll)
+        if log_enabled:
+            for dept_code in sorted(list(processed_payroll.keys())):
+                dept_title = department_to_title.get(dept_code, dept_code)
+                history_total = processed_payroll[dept_code]
+                log_lines.append(f"\n  📁 Department: {dept_code} ({dept_title})\n     {'─'*76}\n")
+                log_lines.append(f"        • Contract: (Not used for Prior Year)\n")
+                log_lines.append(f"        • Salary: (Not used for Prior Year)\n")
+                log_lines.append(f"        • Historical Total: ${history_total:,.2f}\n")
+                log_lines.append(f"     ✅ FINAL PAYROLL TOTAL: ${history_total:,.2f}\n")
+            log_lines.append(f"\n{'='*80}\n")
+            self._emit_log(''.join(log_lines), debug_log_file)
         return processed_payroll
 
     def _process_budget_dataframe(self, dataframe: pd.DataFrame, department_to_title: Dict, 
@@ -431,24 +507,49 @@ class AnalysisEngine:
         amount_col = DataUtils.get_col(dataframe, CandidateColumns.budgetAmount)
         title_col = DataUtils.get_col(dataframe, CandidateColumns.departmentTitle)
         if code_col and type_col and amount_col:
-            for _, row in dataframe.iterrows():
-                dept_code = DataUtils.trim_dept_code(row[code_col])
-                amount = DataUtils.normalize_value(row[amount_col])
-                budget_type = str(row[type_col]).strip().lower() if pd.notna(row[type_col]) else ""
-                if not dept_code:
-                    continue
-                if 'visits' in budget_type:
-                    continue
-                if dept_code not in processed_budget:
-                    processed_budget[dept_code] = {'Payroll': 0.0, 'Revenue': 0.0}
-                if 'payroll' in budget_type:
-                    processed_budget[dept_code]['Payroll'] = amount
-                elif 'revenue' in budget_type:
-                    processed_budget[dept_code]['Revenue'] = amount
-                if title_col and title_col in row and pd.notna(row[title_col]) and dept_code not in department_to_title:
-                    department_to_title[dept_code] = str(row[title_col]).strip()
+            dept_codes = DataUtils.trim_dept_codes(dataframe[code_col])
+            budget_types = self._budget_types(dataframe[type_col])
+            amounts = DataUtils.normalize_series(dataframe[amount_col])
+            is_visits = budget_types.str.contains('visits', regex=False)
+            processed_budget = self._budget_by_department(dept_codes[~is_visits], budget_types[~is_visits], amounts[~is_visits])
+            if title_col:
+                is_financial = ~is_visits
+                self._merge_titles(department_to_title, dept_codes[is_financial], dataframe[title_col][is_financial])
         return processed_budget
 
+    def _budget_by_department(self, dept_codes: pd.Series, budget_types: pd.Series, 
+                              amounts: pd.Series) -> Dict[str, Dict[str, float]]:
+        """
+        Build {dept_code: {'Payroll', 'Revenue'}} from non-visits budget rows
+        
+        Every department with a non-empty code gets an entry (0.0 when it has no
+        matching row); when a type repeats for a department the last row wins.
+        
+        Args:
+            dept_codes: Trimmed department codes
+            budget_types: Cleaned budget type labels (see _budget_types)
+            amounts: Normalized budget amounts
+        
+        Returns:
+            Dictionary mapping department code to its payroll and revenue budget
+        """
+        has_code = dept_codes != ''
+        is_payroll = has_code & budget_types.str.contains('payroll', regex=False)
+        is_revenue = has_code & ~is_payroll & budget_types.str.contains('revenue', regex=False)
+        payroll_by_dept = dict(zip(dept_codes[is_payroll], amounts[is_payroll]))
+        revenue_by_dept = dict(zip(dept_codes[is_revenue], amounts[is_revenue]))
+        return {
+            dept_code: {'Payroll': payroll_by_dept.get(dept_code, 0.0), 'Revenue': revenue_by_dept.get(dept_code, 0.0)}
+            for dept_code in dept_codes[has_code].unique()
+        }
+
+    def _budget_types(self, raw_types: pd.Series) -> pd.Series:
+        """Lower-cased, stripped budget type labels ('' for missing)."""
+        # Only a handful of distinct types exist, so clean each distinct label once and map it back
+        raw_types = raw_types.astype('category')
+        labels = {raw_type: str(raw_type).strip().lower() for raw_type in raw_types.cat.categories}
+        return raw_types.map(labels).astype(object).fillna("")
+
     def _process_budget(self, data_store: Dict, range_names: List[str], department_to_title: Dict, visits_mapping: Dict) -> Tuple[Dict, Dict]:
         processed_financial_budget = {name: {} for name in range_names}
         processed_visits_budget = {name: {} for name in range_names}
@@ -463,27 +564,24 @@ class AnalysisEngine:
                 amount_col = DataUtils.get_col(dataframe, CandidateColumns.budgetAmount)
                 title_col = DataUtils.get_col(dataframe, CandidateColumns.departmentTitle)
                 if code_col and type_col and amount_col:
-                    for _, row in dataframe.iterrows():
-                        dept_code = DataUtils.trim_dept_code(row[code_col])
-                        amount = DataUtils.normalize_value(row[amount_col])
-                        budget_type = str(row[type_col]).strip().lower() if pd.notna(row[type_col]) else ""
-                        if not dept_code:
-                            continue
-                        if 'visits' in budget_type:
-                            if dept_code in visits_mapping:
-                                location_name = visits_mapping[dept_code]
-                                processed_visits_budget[range_name][location_name] = amount
-                        else:
-                            if dept_code not in processed_financial_budget[range_name]:
-                                processed_financial_budget[range_name][dept_code] = {'Payroll': 0.0, 'Revenue': 0.0}
-                            if 'payroll' in budget_type:
-                                processed_financial_budget[range_name][dept_code]['Payroll'] = amount
-                            elif 'revenue' in budget_type:
-                                processed_financial_budget[range_name][dept_code]['Revenue'] = amount
-                            if title_col and title_col in row and pd.notna(row[title_col]) and dept_code not in department_to_title:
-                                department_to_title[dept_code] = str(row[title_col]).strip()
+                    dept_codes = DataUtils.trim_dept_codes(dataframe[code_col])
+                    budget_types = self._budget_types(dataframe[type_col])
+                    amounts = DataUtils.normalize_series(dataframe[amount_col])
+                    is_visits = budget_types.str.contains('visits', regex=False)
+                    is_mapped_visits = is_visits & dept_codes.isin(list(visits_mapping))
+                    for dept_code, amount in zip(dept_codes[is_mapped_visits], amounts[is_mapped_visits]):
+                        processed_visits_budget[range_name][visits_mapping[dept_code]] = amount
+                    processed_financial_budget[range_name] = self._budget_by_department(
+                        dept_codes[~is_visits], budget_types[~is_visits], amounts[~is_visits])
+                    if title_col:
+                        is_financial = ~is_visits
+                        self._merge_titles(department_to_title, dept_codes[is_financial], dataframe[title_col][is_financial])
         return processed_financial_budget, processed_visits_budget
 
+    def _budget_range_keys(self, columns: List[str]) -> List[Optional[str]]:
+        """Budget range name for each budget column, None for actual/prior year columns."""
+        return [self._get_budget_range_name(c) if c.endswith(" (Budget)") else None for c in columns]
+
     def _get_budget_range_name(self, column_name: str) -> str:
         if column_name == "Week Total (Actual) (Budget)":
             return "For The Week Ending (Actual)"
@@ -627,8 +725,7 @@ class AnalysisEngine:
         current_section = None
         section_start_idx = None
         
-        for idx, row in df.iterrows():
-            row_header = row.get('Row Header', '')
+        for idx, row_header in zip(df.index, df['Row Header']):
             if row_header in section_headers:
                 # Save previous section if exists
                 if current_section and section_start_idx is not None:
@@ -710,38 +807,37 @@ class AnalysisEngine:
         if not has_data:
             return
         
-        print(f"\n{'='*80}")
-        print(f"📊 {insight_type} INSIGHTS - TOP & BOTTOM 3 BY VARIANCE CATEGORY AND SECTION")
-        print(f"{'='*80}")
-        
-        for variance_col_name, sections_dict in variance_top_bottom_dict.items():
-            if not sections_dict:
-                continue
-            
-            print(f"\n{'─'*80}")
-            print(f"🔍 VARIANCE CATEGORY: {variance_col_name}")
-            print(f"{'─'*80}")
+        if self.verbose:
+            log_lines = [f"\n{'='*80}\n📊 {insight_type} INSIGHTS - TOP & BOTTOM 3 BY VARIANCE CATEGORY AND SECTION\n{'='*80}\n"]
             
-            for section_name in ['Visits', 'Payroll', 'Revenue']:
-                if section_name not in sections_dict:
-                    continue
-                
-                top_bottom = sections_dict[section_name]
-                if top_bottom['top'].empty and top_bottom['bottom'].empty:
+            for variance_col_name, sections_dict in variance_top_bottom_dict.items():
+                if not sections_dict:
                     continue
                 
-                print(f"\n📂 SECTION: {section_name}")
-                print(f"\n  📈 TOP 3 (Highest Variance):")
-                if not top_bottom['top'].empty:
-                    print(top_bottom['top'].to_string(index=False))
-                else:
-                    print("  No data available")
+                log_lines.append(f"\n{'─'*80}\n🔍 VARIANCE CATEGORY: {variance_col_name}\n{'─'*80}\n")
                 
-                print(f"\n  📉 BOTTOM 3 (Lowest Variance):")
-                if not top_bottom['bottom'].empty:
-                    print(top_bottom['bottom'].to_string(index=False))
-                else:
-                    print("  No data available")
+                for section_name in ['Visits', 'Payroll', 'Revenue']:
+                    if section_name not in sections_dict:
+                        continue
+                    
+                    top_bottom = sections_dict[section_name]
+                    if top_bottom['top'].empty and top_bottom['bottom'].empty:
+                        continue
+                    
+                    log_lines.append(f"\n📂 SECTION: {section_name}\n")
+                    log_lines.append(f"\n  📈 TOP 3 (Highest Variance):\n")
+                    if not top_bottom['top'].empty:
+                        log_lines.append(top_bottom['top'].to_string(index=False) + "\n")
+                    else:
+                        log_lines.append("  No data available\n")
+                    
+                    log_lines.append(f"\n  📉 BOTTOM 3 (Lowest Variance):\n")
+                    if not top_bottom['bottom'].empty:
+                        log_lines.append(top_bottom['bottom'].to_string(index=False) + "\n")
+                    else:
+                        log_lines.append("  No data available\n")
+            
+            print(''.join(log_lines), end='')
         
         try:
             useful_file = os.path.join(
@@ -749,7 +845,7 @@ class AnalysisEngine:
                 f"useful_{insight_type}_Insights_{DataUtils.sanitize_filename(resort_name)}_{report_date_string}{f'-{file_name_postfix}' if file_name_postfix else ''}.xlsx"
             )
             
-            workbook = xlsxwriter.Workbook(useful_file, {'nan_inf_to_errors': True})
+            workbook = xlsxwriter.Workbook(useful_file, {'nan_inf_to_errors': True, 'in_memory': True})
             worksheet = workbook.add_worksheet("Top & Bottom 3")
             
             header_format = workbook.add_format({
@@ -825,7 +921,9 @@ class AnalysisEngine:
                     current_row += 1
                     
                     if not top_bottom['top'].empty:
-                        for _, row in top_bottom['top'].iterrows():
+                        section_columns = list(top_bottom['top'].columns)
+                        for row_values in top_bottom['top'].itertuples(index=False, name=None):
+                            row = dict(zip(section_columns, row_values))
                             self._write_insight_row(
                                 worksheet, row, column_names, current_row,
                                 data_format, percent_format, empty_format
@@ -847,7 +945,9 @@ class AnalysisEngine:
                     current_row += 1
                     
                     if not top_bottom['bottom'].empty:
-                        for _, row in top_bottom['bottom'].iterrows():
+                        section_columns = list(top_bottom['bottom'].columns)
+                        for row_values in top_bottom['bottom'].itertuples(index=False, name=None):
+                            row = dict(zip(section_columns, row_values))
                             self._write_insight_row(
                                 worksheet, row, column_names, current_row,
                                 data_format, percent_format, empty_format
@@ -869,12 +969,12 @@ class AnalysisEngine:
         except Exception as e:
             print(f"⚠️  Warning: Failed to export insights: {e}")
     
-    def _write_insight_row(self, worksheet, row: pd.Series, column_names: List[str], 
+    def _write_insight_row(self, worksheet, row: Dict[str, Any], column_names: List[str], 
                           row_idx: int, data_format, percent_format, empty_format):
         """Helper method to write a single insight row to Excel worksheet."""
         for col_idx, col_name in enumerate(column_names):
             try:
-                if col_name not in row.index:
+                if col_name not in row:
                     worksheet.write(row_idx, col_idx, '', empty_format)
                     continue
                 
@@ -908,7 +1008,8 @@ class AnalysisEngine:
         
         file_path = os.path.join(self.output_dir, f"{DataUtils.sanitize_filename(resort_name)}_dmr_insights_{report_date_string}{f'-{file_name_postfix}' if file_name_postfix else ''}.xlsx")
         
-        workbook = xlsxwriter.Workbook(file_path, {'nan_inf_to_errors': True})
+        # Insights sheets are small, so build the XML parts in memory instead of in temp files
+        workbook = xlsxwriter.Workbook(file_path, {'nan_inf_to_errors': True, 'in_memory': True})
         
         header_format = workbook.add_format({'bold': True, 'align': 'center', 'bg_color': '#D3D3D3', 'border': 1, 'text_wrap': True})
         section_header_format = workbook.add_format({'bold': True, 'bg_color': '#E6E6E6', 'border': 1})
@@ -922,10 +1023,9 @@ class AnalysisEngine:
         for col_idx, col_name in enumerate(insights_dataframe.columns):
             worksheet.write(0, col_idx, col_name, header_format)
         
-        for row_idx, (_, row) in enumerate(insights_dataframe.iterrows(), start=1):
-            for col_idx, col_name in enumerate(insights_dataframe.columns):
-                cell_value = row[col_name]
-                
+        insight_columns = list(insights_dataframe.columns)
+        for row_idx, row_values in enumerate(insights_dataframe.itertuples(index=False, name=None), start=1):
+            for col_idx, (col_name, cell_value) in enumerate(zip(insight_columns, row_values)):
                 if col_name == 'Row Header':
                     if pd.notna(cell_value) and cell_value != '':
                         format_to_use = section_header_format if cell_value in ['Visits', 'Payroll', 'Revenue'] else row_header_format
@@ -952,106 +1052,121 @@ class AnalysisEngine:
         print(f"✓ DMR Insights saved: {file_path}")
         return file_path
 
-    def _write_snow_section(self, worksheet, row, columns, processed_snow, snow_format, row_header_format):
+    def _build_formats(self, workbook, format_specs: Dict[str, Dict]) -> Dict[str, Any]:
+        """Add each named format spec to the workbook and return the Format objects by name."""
+        return {name: workbook.add_format(properties) for name, properties in format_specs.items()}
+
+    def _write_value_runs(self, worksheet, row, values, cell_format):
+        """Write values into columns 1.. of a row, one write_row per contiguous run, leaving None entries unwritten."""
+        run_start = 0
+        for i in range(len(values) + 1):
+            if i == len(values) or values[i] is None:
+                if i > run_start:
+                    worksheet.write_row(row, run_start + 1, values[run_start:i], cell_format)
+                run_start = i + 1
+
+    def _write_snow_section(self, worksheet, row, columns, budget_range_keys, processed_snow, snow_format, row_header_format):
         worksheet.write(row, 0, "Snow 24hrs", row_header_format)
-        for i, col_name in enumerate(columns):
-            if not col_name.endswith(" (Budget)"):
-                value = DataUtils.normalize_value(processed_snow[col_name]['snow_24hrs'])
-                worksheet.write(row, i + 1, value, snow_format)
+        values = [None if range_key else processed_snow[col_name]['snow_24hrs']
+                  for col_name, range_key in zip(columns, budget_range_keys)]
+        self._write_value_runs(worksheet, row, values, snow_format)
         row += 1
         worksheet.write(row, 0, "Base Depth", row_header_format)
-        for i, col_name in enumerate(columns):
-            if not col_name.endswith(" (Budget)"):
-                value = DataUtils.normalize_value(processed_snow[col_name]['base_depth'])
-                worksheet.write(row, i + 1, value, snow_format)
+        values = [None if range_key else processed_snow[col_name]['base_depth']
+                  for col_name, range_key in zip(columns, budget_range_keys)]
+        self._write_value_runs(worksheet, row, values, snow_format)
         return row + 2
 
-    def _write_visits_section(self, worksheet, row, columns, processed_visits, processed_budget, 
+    def _write_visits_section(self, worksheet, row, columns, budget_range_keys, processed_visits, processed_budget, 
                               all_locations, resort_name, row_header_format, data_format, header_format):
         worksheet.write(row, 0, "VISITS", header_format)
         row += 1
+        # Resolve each column's source dict once; budget columns are keyed by processed location name
+        column_sources = [(processed_budget.get(range_key, {}), True) if range_key else (processed_visits[col_name], False)
+                          for col_name, range_key in zip(columns, budget_range_keys)]
         for location in sorted(list(all_locations)):
             worksheet.write(row, 0, location, row_header_format)
-            for i, col_name in enumerate(columns):
-                if col_name.endswith(" (Budget)"):
-                    range_key = self._get_budget_range_name(col_name)
-                    loc_key = DataUtils.process_location_name(location, resort_name)
-                    value = processed_budget.get(range_key, {}).get(loc_key, 0)
-                else:
-                    value = processed_visits[col_name].get(location, 0)
-                worksheet.write(row, i + 1, DataUtils.normalize_value(value), data_format)
+            loc_key = DataUtils.process_location_name(location, resort_name)
+            values = [source.get(loc_key if is_budget else location, 0.0) for source, is_budget in column_sources]
+            worksheet.write_row(row, 1, values, data_format)
             row += 1
         
         worksheet.write(row, 0, "Total Tickets", header_format)
-        for i, col_name in enumerate(columns):
-            if col_name.endswith(" (Budget)"):
-                range_key = self._get_budget_range_name(col_name)
-                total_val = sum(processed_budget.get(range_key, {}).values())
-            else:
-                total_val = sum(processed_visits[col_name].values())
-            worksheet.write(row, i + 1, DataUtils.normalize_value(total_val), data_format)
+        values = [DataUtils.normalize_value(sum(source.values())) for source, _ in column_sources]
+        worksheet.write_row(row, 1, values, data_format)
         return row + 2
 
-    def _write_financials_section(self, worksheet, row, columns, processed_revenue, processed_payroll, 
+    def _flatten_budget(self, processed_budget: Dict) -> Dict[Tuple[str, str], Tuple[float, float]]:
+        """Flatten {range: {dept: {'Revenue', 'Payroll'}}} into {(range, dept): (revenue, payroll)} for single-probe lookups."""
+        return {
+            (range_key, dept_code): (budget_data.get('Revenue', 0.0), budget_data.get('Payroll', 0.0))
+            for range_key, range_budget in processed_budget.items()
+            for dept_code, budget_data in range_budget.items()
+        }
+
+    def _write_financials_section(self, worksheet, row, columns, budget_range_keys, processed_revenue, processed_payroll, 
                                   processed_budget, sorted_depts, dept_to_title, 
                                   row_header_format, data_format, header_format, percent_format):
         worksheet.write(row, 0, "FINANCIALS", header_format)
         row += 1
-        for dept_code in sorted_depts:
-            trimmed_code = DataUtils.trim_dept_code(dept_code)
+        # Build (dept x column) revenue/payroll matrices once, flattening budget ranges to {dept: amount}
+        revenue_sources, payroll_sources = {}, {}
+        for i, (col_name, range_key) in enumerate(zip(columns, budget_range_keys)):
+            if range_key:
+                range_budget = processed_budget.get(range_key, {})
+                revenue_sources[i] = {dept: budget_data.get('Revenue', 0.0) for dept, budget_data in range_budget.items()}
+                payroll_sources[i] = {dept: budget_data.get('Payroll', 0.0) for dept, budget_data in range_budget.items()}
+            else:
+                revenue_sources[i] = processed_revenue[col_name]
+                payroll_sources[i] = processed_payroll[col_name]
+        
+        trimmed_depts = [DataUtils.trim_dept_code(d) for d in sorted_depts]
+        column_index = range(len(columns))
+        revenue_matrix = pd.DataFrame(revenue_sources, columns=column_index, dtype='float64').reindex(trimmed_depts).fillna(0.0)
+        payroll_matrix = pd.DataFrame(payroll_sources, columns=column_index, dtype='float64').reindex(trimmed_depts).fillna(0.0)
+        percent_matrix = (payroll_matrix.abs() / revenue_matrix.abs() * 100).where(revenue_matrix != 0, 0.0)
+        
+        for trimmed_code, revenue_values, payroll_values, percent_values in zip(
+                trimmed_depts, revenue_matrix.to_numpy().tolist(),
+                payroll_matrix.to_numpy().tolist(), percent_matrix.to_numpy().tolist()):
             title = dept_to_title.get(trimmed_code, trimmed_code)
             
             worksheet.write(row, 0, f"{title} - Revenue", row_header_format)
-            for i, col_name in enumerate(columns):
-                if col_name.endswith(" (Budget)"):
-                    range_key = self._get_budget_range_name(col_name)
-                    val = processed_budget.get(range_key, {}).get(trimmed_code, {}).get('Revenue', 0)
-                else:
-                    val = processed_revenue[col_name].get(trimmed_code, 0)
-                worksheet.write(row, i + 1, DataUtils.normalize_value(val), data_format)
+            worksheet.write_row(row, 1, revenue_values, data_format)
             row += 1
             
             worksheet.write(row, 0, f"{title} - Payroll", row_header_format)
-            for i, col_name in enumerate(columns):
-                if col_name.endswith(" (Budget)"):
-                    range_key = self._get_budget_range_name(col_name)
-                    val = processed_budget.get(range_key, {}).get(trimmed_code, {}).get('Payroll', 0)
-                else:
-                    val = processed_payroll[col_name].get(trimmed_code, 0)
-                worksheet.write(row, i + 1, DataUtils.normalize_value(val), data_format)
+            worksheet.write_row(row, 1, payroll_values, data_format)
             row += 1
             
             row_header_format_text = f"PR % of {title}"
             worksheet.write(row, 0, row_header_format_text, row_header_format)
-            for i, col_name in enumerate(columns):
-                if col_name.endswith(" (Budget)"):
-                    range_key = self._get_budget_range_name(col_name)
-                    budget_data = processed_budget.get(range_key, {}).get(trimmed_code, {})
-                    revenue = abs(DataUtils.normalize_value(budget_data.get('Revenue', 0)))
-                    payroll = abs(DataUtils.normalize_value(budget_data.get('Payroll', 0)))
-                else:
-                    revenue = abs(DataUtils.normalize_value(processed_revenue[col_name].get(trimmed_code, 0)))
-                    payroll = abs(DataUtils.normalize_value(processed_payroll[col_name].get(trimmed_code, 0)))
-                
-                percentage = (payroll / revenue * 100) if revenue != 0 else 0
-                worksheet.write(row, i + 1, percentage, percent_format)
+            worksheet.write_row(row, 1, percent_values, percent_format)
             row += 1
         return row + 1
 
-    def _write_totals_section(self, worksheet, row, columns, processed_revenue, processed_payroll, 
+    def _write_totals_section(self, worksheet, row, columns, budget_range_keys, processed_revenue, processed_payroll, 
                               processed_budget, sorted_depts, data_format, header_format, percent_format):
         labels = ["Total Revenue", "Total Payroll", "PR % of Total Revenue", "Net Total Revenue"]
+        trimmed_depts = [DataUtils.trim_dept_code(d) for d in sorted_depts]
+        budget_flat = self._flatten_budget(processed_budget)
+        
+        # Revenue/payroll totals per column, computed once rather than once per label
+        column_totals = []
+        for col_name, range_key in zip(columns, budget_range_keys):
+            if range_key:
+                dept_budgets = [budget_flat.get((range_key, d), (0.0, 0.0)) for d in trimmed_depts]
+                revenue_total = sum(revenue for revenue, _ in dept_budgets)
+                payroll_total = sum(payroll for _, payroll in dept_budgets)
+            else:
+                revenue_total = sum(processed_revenue[col_name].values())
+                payroll_total = sum(processed_payroll[col_name].values())
+            column_totals.append((revenue_total, payroll_total))
+        
         for label in labels:
             worksheet.write(row, 0, label, header_format)
-            for i, col_name in enumerate(columns):
-                if col_name.endswith(" (Budget)"):
-                    range_key = self._get_budget_range_name(col_name)
-                    revenue_total = sum(DataUtils.normalize_value(processed_budget.get(range_key, {}).get(DataUtils.trim_dept_code(d), {}).get('Revenue', 0)) for d in sorted_depts)
-                    payroll_total = sum(DataUtils.normalize_value(processed_budget.get(range_key, {}).get(DataUtils.trim_dept_code(d), {}).get('Payroll', 0)) for d in sorted_depts)
-                else:
-                    revenue_total = sum(processed_revenue[col_name].values())
-                    payroll_total = sum(processed_payroll[col_name].values())
-                
+            values = []
+            for revenue_total, payroll_total in column_totals:
                 if label == "Total Revenue": 
                     final_value = revenue_total
                 elif label == "Total Payroll": 
@@ -1060,8 +1175,9 @@ class AnalysisEngine:
                     final_value = (abs(payroll_total) / abs(revenue_total) * 100) if revenue_total != 0 else 0
                 else: 
                     final_value = revenue_total - payroll_total
-                
-                worksheet.write(row, i + 1, final_value, percent_format if "PR %" in label else data_format)
+                values.append(final_value)
+            
+            worksheet.write_row(row, 1, values, percent_format if "PR %" in label else data_format)
             row += 1
 
     def generate_analysis(self, resort_config: Dict, run_date: Union[str, datetime] = None, 
@@ -1086,52 +1202,57 @@ class AnalysisEngine:
         db_name = resort_config.get('dbName', resort_name)
         group_num = resort_config.get('groupNum', -1)
         
-        date_calculator = DateRangeCalculator(report_date, is_current_date=is_current, use_exact_date=not is_current)
+        date_calculator = self._get_date_calculator(report_date, is_current)
         ranges = date_calculator.get_all_ranges()
         range_names_ordered = list(ranges.keys())
         report_date_string = ranges["For The Day (Actual)"][0].strftime("%Y%m%d")
+        file_suffix = f"{report_date_string}{f'-{file_name_postfix}' if file_name_postfix else ''}"
         
         debug_directory, debug_log_handle = None, None
         if debug:
             sanitized_resort = DataUtils.sanitize_filename(resort_name).lower()
-            debug_directory = os.path.join(self.output_dir, f"Debug-{sanitized_resort}-{report_date_string}{f'-{file_name_postfix}' if file_name_postfix else ''}")
-            if not os.path.exists(debug_directory): os.makedirs(debug_directory)
+            debug_directory = os.path.join(self.output_dir, f"Debug-{sanitized_resort}-{file_suffix}")
+            os.makedirs(debug_directory, exist_ok=True)
             debug_log_handle = open(os.path.join(debug_directory, "DebugLogs.txt"), 'w', encoding='utf-8')
 
         data_store = {name: {} for name in range_names_ordered}
         actual_range_names = ["For The Day (Actual)", "For The Week Ending (Actual)", "Month to Date (Actual)", "For Winter Ending (Actual)"]
         
-        with DatabaseConnection() as conn:
-            stored_procedures_handler = StoredProcedures(conn)
-            for name in range_names_ordered:
-                start, end = ranges[name]
-                print(f"   ⏳ Fetching {name} ({start.date()} to {end.date()})...")
-                
-                data_store[name]['revenue'] = stored_procedures_handler.execute_revenue(db_name, group_num, start, end)
-                data_store[name]['visits'] = stored_procedures_handler.execute_visits(resort_name, start, end)
-                data_store[name]['snow'] = stored_procedures_handler.execute_weather(resort_name, start, end)
-                
-                if not is_current:
-                    if name in actual_range_names:
-                        data_store[name]['payroll'] = stored_procedures_handler.execute_payroll(resort_name, start, end)
-                        data_store[name]['salary_payroll'] = stored_procedures_handler.execute_payroll_salary(resort_name, start, end)
-                        if name == "For The Week Ending (Actual)":
-                            # Full week total budget (Monday-Sunday) for DMR report
-                            budget_week_total_start, budget_week_total_end = date_calculator.week_total_actual()
-                            data_store[name]['budget_week_total'] = stored_procedures_handler.execute_budget(resort_name, budget_week_total_start, budget_week_total_end)
-                            # Week-to-date budget (Monday to report date) for insights comparison
-                            budget_week_to_date_start, budget_week_to_date_end = start, end
-                            data_store[name]['budget_week_to_date'] = stored_procedures_handler.execute_budget(resort_name, budget_week_to_date_start, budget_week_to_date_end)
-                        else:
-                            budget_start, budget_end = start, end
-                            data_store[name]['budget'] = stored_procedures_handler.execute_budget(resort_name, budget_start, budget_end)
+        fetch_tasks = {}
+        for name in range_names_ordered:
+            start, end = ranges[name]
+            fetch_tasks[(name, 'revenue')] = lambda sp, s=start, e=end: sp.execute_revenue(db_name, group_num, s, e)
+            fetch_tasks[(name, 'visits')] = lambda sp, s=start, e=end: sp.execute_visits(resort_name, s, e)
+            fetch_tasks[(name, 'snow')] = lambda sp, s=start, e=end: sp.execute_weather(resort_name, s, e)
+            
+            if not is_current:
+                if name in actual_range_names:
+                    fetch_tasks[(name, 'payroll')] = lambda sp, s=start, e=end: sp.execute_payroll(resort_name, s, e)
+                    fetch_tasks[(name, 'salary_payroll')] = lambda sp, s=start, e=end: sp.execute_payroll_salary(resort_name, s, e)
+                    if name == "For The Week Ending (Actual)":
+                        # Full week total budget (Monday-Sunday) for DMR report
+                        budget_week_total_start, budget_week_total_end = date_calculator.week_total_actual()
+                        fetch_tasks[(name, 'budget_week_total')] = lambda sp, s=budget_week_total_start, e=budget_week_total_end: sp.execute_budget(resort_name, s, e)
+                        # Week-to-date budget (Monday to report date) for insights comparison
+                        fetch_tasks[(name, 'budget_week_to_date')] = lambda sp, s=start, e=end: sp.execute_budget(resort_name, s, e)
                     else:
-                        data_store[name]['payroll_history'] = stored_procedures_handler.execute_payroll_history(resort_name, start, end)
-
-                for key in ['revenue', 'visits', 'snow', 'payroll', 'salary_payroll', 'budget', 'budget_week_total', 'budget_week_to_date', 'payroll_history']:
-                    if key not in data_store[name]: data_store[name][key] = pd.DataFrame()
-                    if debug and not data_store[name][key].empty:
-                        self._export_sp_result(data_store[name][key], name, key.capitalize(), resort_name, debug_directory)
+                        fetch_tasks[(name, 'budget')] = lambda sp, s=start, e=end: sp.execute_budget(resort_name, s, e)
+                else:
+                    fetch_tasks[(name, 'payroll_history')] = lambda sp, s=start, e=end: sp.execute_payroll_history(resort_name, s, e)
+        
+        print(f"   ⏳ Fetching {len(range_names_ordered)} date ranges ({len(fetch_tasks)} stored procedure calls)...")
+        for (name, key), dataframe in fetch_concurrently(fetch_tasks).items():
+            data_store[name][key] = dataframe
+        
+        export_jobs = []
+        for name in range_names_ordered:
+            for key in ['revenue', 'visits', 'snow', 'payroll', 'salary_payroll', 'budget', 'budget_week_total', 'budget_week_to_date', 'payroll_history']:
+                if key not in data_store[name]: data_store[name][key] = pd.DataFrame()
+                if debug and not data_store[name][key].empty:
+                    export_jobs.append({'dataframe': data_store[name][key], 'range_name': name,
+                                        'stored_procedure_name': key.capitalize(), 'resort_name': resort_name,
+                                        'export_directory': debug_directory})
+        self._export_sp_results(export_jobs)
 
         locations_set, departments_set, code_to_title_map = set(), set(), {}
         processed_snow = self._process_snow(data_store, range_names_ordered)
@@ -1154,15 +1275,17 @@ class AnalysisEngine:
                 insights_budget["For The Week Ending (Actual)"] = week_to_date_budget_dict
 
         if generate_report:
-            file_path = os.path.join(self.output_dir, f"{DataUtils.sanitize_filename(resort_name)}_Report_{report_date_string}{f'-{file_name_postfix}' if file_name_postfix else ''}.xlsx")
-            workbook = xlsxwriter.Workbook(file_path, {'nan_inf_to_errors': True})
+            file_path = os.path.join(self.output_dir, f"{DataUtils.sanitize_filename(resort_name)}_Report_{file_suffix}.xlsx")
+            # The report is written strictly top to bottom, so rows can be flushed to disk as they complete
+            workbook = xlsxwriter.Workbook(file_path, {'nan_inf_to_errors': True, 'constant_memory': True})
             worksheet = workbook.add_worksheet("Report")
             
-            header_format = workbook.add_format({'bold':True,'align':'center','bg_color':'#D3D3D3','border':1,'text_wrap':True})
-            row_header_format = workbook.add_format({'bold':True,'border':1})
-            data_format = workbook.add_format({'border':1, 'num_format':'#,##0.00'})
-            snow_format = workbook.add_format({'border':1, 'num_format':'0.0'})
-            percent_format = workbook.add_format({'border':1, 'num_format':'0"%"'})
+            formats = self._build_formats(workbook, self.REPORT_FORMATS)
+            header_format = formats['header']
+            row_header_format = formats['row_header']
+            data_format = formats['data']
+            snow_format = formats['snow']
+            percent_format = formats['percent']
             
             day_actual_start = ranges["For The Day (Actual)"][0]
             title_text = f"{resort_name} Resort\nDaily Management Report\nAs of {day_actual_start.strftime('%A')} - {day_actual_start.strftime('%d %B, %Y').lstrip('0')}"
@@ -1174,9 +1297,11 @@ class AnalysisEngine:
                 if name in actual_range_names:
                     column_structure.append("Week Total (Actual) (Budget)" if name == "For The Week Ending (Actual)" else f"{name} (Budget)")
             
-            for i, col_name in enumerate(column_structure):
-                if col_name.endswith(" (Budget)"):
-                    start, end = (date_calculator.week_total_actual() if col_name == "Week Total (Actual) (Budget)" else ranges[self._get_budget_range_name(col_name)])
+            # Budget range per column, resolved once and shared by every section writer
+            budget_range_keys = self._budget_range_keys(column_structure)
+            for i, (col_name, range_key) in enumerate(zip(column_structure, budget_range_keys)):
+                if range_key:
+                    start, end = (date_calculator.week_total_actual() if col_name == "Week Total (Actual) (Budget)" else ranges[range_key])
                 else:
                     start, end = ranges[col_name]
                 worksheet.write(0, i + 1, f"{col_name}\n{start.strftime('%b %d')} - {end.strftime('%b %d')}", header_format)
@@ -1185,10 +1310,10 @@ class AnalysisEngine:
             worksheet.set_column(0, 0, 30)
             worksheet.freeze_panes(1, 1)
             
-            current_row = self._write_snow_section(worksheet, 1, column_structure, processed_snow, snow_format, row_header_format)
-            current_row = self._write_visits_section(worksheet, current_row, column_structure, processed_visits, processed_visits_budget, locations_set, resort_name, row_header_format, data_format, header_format)
-            current_row = self._write_financials_section(worksheet, current_row, column_structure, processed_revenue, processed_payroll, processed_budget, sorted(list(departments_set)), code_to_title_map, row_header_format, data_format, header_format, percent_format)
-            self._write_totals_section(worksheet, current_row + 1, column_structure, processed_revenue, processed_payroll, processed_budget, sorted(list(departments_set)), data_format, header_format, percent_format)
+            current_row = self._write_snow_section(worksheet, 1, column_structure, budget_range_keys, processed_snow, snow_format, row_header_format)
+            current_row = self._write_visits_section(worksheet, current_row, column_structure, budget_range_keys, processed_visits, processed_visits_budget, locations_set, resort_name, row_header_format, data_format, header_format)
+            current_row = self._write_financials_section(worksheet, current_row, column_structure, budget_range_keys, processed_revenue, processed_payroll, processed_budget, sorted(list(departments_set)), code_to_title_map, row_header_format, data_format, header_format, percent_format)
+            self._write_totals_section(worksheet, current_row + 1, column_structure, budget_range_keys, processed_revenue, processed_payroll, processed_budget, sorted(list(departments_set)), data_format, header_format, percent_format)
             
             workbook.close()
             print(f"✓ Report saved: {file_path}")
@@ -1236,39 +1361,76 @@ class AnalysisEngine:
         )
         return result.get('report_path', '')
 
+    def _export_sp_results(self, export_jobs: List[Dict[str, Any]]) -> List[str]:
+        """
+        Write several debug stored procedure dumps
+        
+        Dumps are written in-process by default. When MCP_EXPORT_MAX_WORKERS is
+        above 1 they are spread over one worker pool that is started on first
+        use and reused by every later call.
+        
+        Args:
+            export_jobs: Keyword arguments for _export_sp_result, one dict per file
+        
+        Returns:
+            Paths of the written files, in job order
+        """
+        if MAX_EXPORT_WORKERS <= 1 or len(export_jobs) <= 1:
+            return [self._export_sp_result(**job) for job in export_jobs]
+        futures = [_get_export_executor().submit(self._export_sp_result, **job) for job in export_jobs]
+        return [future.result() for future in futures]
+
     def _export_sp_result(self, dataframe: pd.DataFrame, range_name: str = None, stored_procedure_name: str = None, 
                          resort_name: str = None, export_directory: str = None, 
                          date_label: str = None) -> str:
         if date_label:
             sanitized_range = DataUtils.sanitize_filename(date_label)
             sanitized_sp = DataUtils.sanitize_filename(stored_procedure_name)
-            file_path = os.path.join(export_directory or self.output_dir, f"{sanitized_range}_{sanitized_sp}.xlsx")
+            file_stem = os.path.join(export_directory or self.output_dir, f"{sanitized_range}_{sanitized_sp}")
         else:
             sanitized_range = DataUtils.sanitize_filename(range_name)
             sanitized_sp = DataUtils.sanitize_filename(stored_procedure_name)
-            file_path = os.path.join(export_directory or self.output_dir, f"{sanitized_range}_{sanitized_sp}.xlsx")
+            file_stem = os.path.join(export_directory or self.output_dir, f"{sanitized_range}_{sanitized_sp}")
         
         dataframe_to_write = dataframe
         if stored_procedure_name in ['Revenue', 'Payroll']:
             dept_column = DataUtils.get_col(dataframe, CandidateColumns.departmentCode + CandidateColumns.departmentTitle)
             if dept_column:
-                dataframe_to_write = dataframe.copy()
-                dataframe_to_write['_sort_key'] = dataframe_to_write[dept_column].astype(str).str.strip()
-                dataframe_to_write = dataframe_to_write.sort_values(by='_sort_key', na_position='last').drop(columns=['_sort_key'])
+                # Sort positions on the key alone, then take rows once, instead of copying the frame to add a key column
+                sort_key = dataframe[dept_column].astype(str).str.strip().reset_index(drop=True)
+                dataframe_to_write = dataframe.take(sort_key.sort_values(na_position='last').index)
         
-        workbook = xlsxwriter.Workbook(file_path, {'nan_inf_to_errors': True})
+        if self.debug_export_format == 'parquet':
+            file_path = f"{file_stem}.parquet"
+            try:
+                DataUtils.downcast_dataframe(dataframe_to_write).to_parquet(file_path, index=False)
+                return file_path
+            except (ImportError, ValueError, TypeError, NotImplementedError) as e:
+                print(f"⚠️  Warning: Parquet export failed for {os.path.basename(file_path)} ({e}); falling back to xlsx")
+        
+        file_path = f"{file_stem}.xlsx"
+        # Widths are set before any row is written, so rows can be flushed to disk as they complete
+        workbook = xlsxwriter.Workbook(file_path, {'nan_inf_to_errors': True, 'constant_memory': True})
         worksheet = workbook.add_worksheet('Data')
-        header_format, data_format = workbook.add_format({'bold': True, 'bg_color': '#D3D3D3', 'border': 1}), workbook.add_format({'border': 1})
-        
-        for col_index, column_name in enumerate(dataframe_to_write.columns):
-            worksheet.write(0, col_index, column_name, header_format)
-            max_column_width = len(str(column_name))
-            for row_index, (_, row_data) in enumerate(dataframe_to_write.iterrows(), start=1):
-                cell_value = row_data[column_name]
-                worksheet.write(row_index, col_index, None if pd.isna(cell_value) else cell_value, data_format)
-                max_column_width = max(max_column_width, len(str(cell_value)))
+        formats = self._build_formats(workbook, self.DATA_SHEET_FORMATS)
+        header_format, data_format = formats['header'], formats['data']
+        
+        # Repeated codes/titles as categoricals: widths are measured per category and cells reuse one string each
+        dataframe_to_write = DataUtils.categorize_strings(dataframe_to_write)
+        column_names = list(dataframe_to_write.columns)
+        for col_index, column_name in enumerate(column_names):
+            column = dataframe_to_write.iloc[:, col_index]
+            data_width = int(column.map(str).str.len().max()) if len(column) else 0
+            max_column_width = max(len(str(column_name)), data_width)
             worksheet.set_column(col_index, col_index, min(max_column_width + 2, 50))
         
+        # One object matrix with missing values as None, so rows go to write_row without per-cell checks
+        cell_matrix = dataframe_to_write.to_numpy(dtype=object, copy=True)
+        cell_matrix[dataframe_to_write.isna().to_numpy()] = None
+        worksheet.write_row(0, 0, column_names, header_format)
+        for row_index, row_values in enumerate(cell_matrix.tolist(), start=1):
+            worksheet.write_row(row_index, 0, row_values, data_format)
+        
         workbook.close()
         return file_path
 
@@ -1283,7 +1445,7 @@ class AnalysisEngine:
         resort_name = resort_config['resortName']
         db_name = resort_config.get('dbName', resort_name)
         group_num = resort_config.get('groupNum', -1)
-        date_calculator = DateRangeCalculator(target_date, is_current_date=is_current_date, use_exact_date=not is_current_date)
+        date_calculator = self._get_date_calculator(target_date, is_current_date)
         day_range = date_calculator.for_the_day_actual()
         start, end = day_range
         data = {
@@ -1294,24 +1456,59 @@ class AnalysisEngine:
             'salary_payroll': pd.DataFrame(),
             'payroll_history': pd.DataFrame()
         }
-        with DatabaseConnection() as conn:
-            stored_procedures_handler = StoredProcedures(conn)
-            print(f"   ⏳ Fetching {date_label} data ({start.date()} to {end.date()})...")
-            data['revenue'] = stored_procedures_handler.execute_revenue(db_name, group_num, start, end)
-            data['visits'] = stored_procedures_handler.execute_visits(resort_name, start, end)
-            data['budget'] = stored_procedures_handler.execute_budget(resort_name, start, end)
-            if is_within_year:
-                data['payroll'] = stored_procedures_handler.execute_payroll(resort_name, start, end)
-                data['salary_payroll'] = stored_procedures_handler.execute_payroll_salary(resort_name, start, end)
-            else:
-                data['payroll_history'] = stored_procedures_handler.execute_payroll_history(resort_name, start, end)
-            if debug and debug_directory:
-                for key in ['revenue', 'visits', 'budget', 'payroll', 'salary_payroll', 'payroll_history']:
-                    if not data[key].empty:
-                        self._export_sp_result(data[key], date_label=date_label, stored_procedure_name=key.capitalize(),
-                                              export_directory=debug_directory)
+        fetch_tasks = {
+            'revenue': lambda sp: sp.execute_revenue(db_name, group_num, start, end),
+            'visits': lambda sp: sp.execute_visits(resort_name, start, end),
+            'budget': lambda sp: sp.execute_budget(resort_name, start, end),
+        }
+        if is_within_year:
+            fetch_tasks['payroll'] = lambda sp: sp.execute_payroll(resort_name, start, end)
+            fetch_tasks['salary_payroll'] = lambda sp: sp.execute_payroll_salary(resort_name, start, end)
+        else:
+            fetch_tasks['payroll_history'] = lambda sp: sp.execute_payroll_history(resort_name, start, end)
+        print(f"   ⏳ Fetching {date_label} data ({start.date()} to {end.date()})...")
+        data.update(fetch_concurrently(fetch_tasks))
+        if debug and debug_directory:
+            self._export_sp_results([
+                {'dataframe': data[key], 'date_label': date_label, 'stored_procedure_name': key.capitalize(),
+                 'export_directory': debug_directory}
+                for key in ['revenue', 'visits', 'budget', 'payroll', 'salary_payroll', 'payroll_history']
+                if not data[key].empty
+            ])
         return data
 
+    def _process_single_day_data(self, data: Dict[str, pd.DataFrame], is_within_year: bool,
+                                 department_to_title: Dict, all_departments: Set[str],
+                                 date_label: str = "", debug_log_file: Any = None) -> Tuple[Dict, Dict, Dict, Dict]:
+        """Process one day's fetched data into (visits, revenue, budget, payroll) dictionaries."""
+        visits, revenue, budget, payroll = {}, {}, {}, {}
+        if not data['visits'].empty:
+            visits = self._process_visits_dataframe(data['visits'])
+        if not data['revenue'].empty:
+            revenue = self._process_revenue_dataframe(data['revenue'], department_to_title, all_departments)
+        if not data['budget'].empty:
+            budget = self._process_budget_dataframe(data['budget'], department_to_title)
+        if is_within_year:
+            if not data['payroll'].empty or not data['salary_payroll'].empty:
+                payroll = self._process_payroll_actual_dataframes(
+                    data['payroll'],
+                    data['salary_payroll'],
+                    department_to_title,
+                    all_departments,
+                    date_label=date_label,
+                    debug_log_file=debug_log_file
+                )
+        else:
+            if not data['payroll_history'].empty:
+                payroll = self._process_payroll_prior_year_dataframe(
+                    data['payroll_history'],
+                    department_to_title,
+                    all_departments,
+                    date_label=date_label,
+                    debug_log_file=debug_log_file
+                )
+        return visits, revenue, budget, payroll
+
     def _calculate_comparison_variance_percentage(self, comparison_value: float, anchor_value: float) -> float:
         comparison_value = DataUtils.normalize_value(comparison_value)
         anchor_value = DataUtils.normalize_value(anchor_value)
@@ -1450,16 +1647,13 @@ class AnalysisEngine:
             anchor_is_current = False
         comparison_is_within_year = self._is_within_one_year(comparison_date)
         anchor_is_within_year = self._is_within_one_year(anchor_date)
+        resort_name = resort_config['resortName']
+        report_date_string = f"{comparison_date.strftime('%Y%m%d')}-{anchor_date.strftime('%Y%m%d')}"
         debug_directory = None
         debug_log_handle = None
         if debug:
-            resort_name = resort_config['resortName']
-            sanitized_resort = DataUtils.sanitize_filename(resort_name).lower()
-            comparison_str = comparison_date.strftime("%Y%m%d")
-            anchor_str = anchor_date.strftime("%Y%m%d")
-            debug_directory = os.path.join(self.insights_dir, f"{comparison_str}-{anchor_str}-insights")
-            if not os.path.exists(debug_directory):
-                os.makedirs(debug_directory)
+            debug_directory = os.path.join(self.insights_dir, f"{report_date_string}-insights")
+            os.makedirs(debug_directory, exist_ok=True)
             debug_log_handle = open(os.path.join(debug_directory, "debugLog.txt"), 'w', encoding='utf-8')
             header = f"""
 {'='*80}
@@ -1474,7 +1668,6 @@ Anchor Date Payroll Method: {'Actual Ranges' if anchor_is_within_year else 'Prio
 
 """
             debug_log_handle.write(header)
-            debug_log_handle.flush()
             print(header, end='')
         print(f"Fetching data for Comparison Date: {comparison_date.strftime('%Y-%m-%d')}")
         comparison_data = self._fetch_single_day_data(
@@ -1490,64 +1683,14 @@ Anchor Date Payroll Method: {'Actual Ranges' if anchor_is_within_year else 'Prio
         )
         department_to_title = {}
         all_departments = set()
-        comparison_visits = {}
-        comparison_revenue = {}
-        comparison_budget = {}
-        comparison_payroll = {}
-        if not comparison_data['visits'].empty:
-            comparison_visits = self._process_visits_dataframe(comparison_data['visits'])
-        if not comparison_data['revenue'].empty:
-            comparison_revenue = self._process_revenue_dataframe(comparison_data['revenue'], department_to_title, all_departments)
-        if not comparison_data['budget'].empty:
-            comparison_budget = self._process_budget_dataframe(comparison_data['budget'], department_to_title)
-        if comparison_is_within_year:
-            if not comparison_data['payroll'].empty or not comparison_data['salary_payroll'].empty:
-                comparison_payroll = self._process_payroll_actual_dataframes(
-                    comparison_data['payroll'],
-                    comparison_data['salary_payroll'],
-                    department_to_title,
-                    all_departments,
-                    date_label="Comparison Date",
-                    debug_log_file=debug_log_handle
-                )
-        else:
-            if not comparison_data['payroll_history'].empty:
-                comparison_payroll = self._process_payroll_prior_year_dataframe(
-                    comparison_data['payroll_history'],
-                    department_to_title,
-                    all_departments,
-                    date_label="Comparison Date",
-                    debug_log_file=debug_log_handle
-                )
-        anchor_visits = {}
-        anchor_revenue = {}
-        anchor_budget = {}
-        anchor_payroll = {}
-        if not anchor_data['visits'].empty:
-            anchor_visits = self._process_visits_dataframe(anchor_data['visits'])
-        if not anchor_data['revenue'].empty:
-            anchor_revenue = self._process_revenue_dataframe(anchor_data['revenue'], department_to_title, all_departments)
-        if not anchor_data['budget'].empty:
-            anchor_budget = self._process_budget_dataframe(anchor_data['budget'], department_to_title)
-        if anchor_is_within_year:
-            if not anchor_data['payroll'].empty or not anchor_data['salary_payroll'].empty:
-                anchor_payroll = self._process_payroll_actual_dataframes(
-                    anchor_data['payroll'],
-                    anchor_data['salary_payroll'],
-                    department_to_title,
-                    all_departments,
-                    date_label="Anchor Date",
-                    debug_log_file=debug_log_handle
-                )
-        else:
-            if not anchor_data['payroll_history'].empty:
-                anchor_payroll = self._process_payroll_prior_year_dataframe(
-                    anchor_data['payroll_history'],
-                    department_to_title,
-                    all_departments,
-                    date_label="Anchor Date",
-                    debug_log_file=debug_log_handle
-                )
+        comparison_visits, comparison_revenue, comparison_budget, comparison_payroll = self._process_single_day_data(
+            comparison_data, comparison_is_within_year, department_to_title, all_departments,
+            date_label="Comparison Date", debug_log_file=debug_log_handle
+        )
+        anchor_visits, anchor_revenue, anchor_budget, anchor_payroll = self._process_single_day_data(
+            anchor_data, anchor_is_within_year, department_to_title, all_departments,
+            date_label="Anchor Date", debug_log_file=debug_log_handle
+        )
         visit_insights = self._generate_visit_insights(
             comparison_visits,
             anchor_visits
@@ -1559,10 +1702,6 @@ Anchor Date Payroll Method: {'Actual Ranges' if anchor_is_within_year else 'Prio
             department_to_title
         )
         
-        comparison_date_str = comparison_date.strftime("%Y%m%d")
-        anchor_date_str = anchor_date.strftime("%Y%m%d")
-        report_date_string = f"{comparison_date_str}-{anchor_date_str}"
-        
         if debug and debug_directory:
             insights_file = os.path.join(debug_directory, "comparison_insights.xlsx")
             with pd.ExcelWriter(insights_file, engine='xlsxwriter') as writer:
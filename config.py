@@ -32,6 +32,11 @@ class DatabaseConfig:
         self.encrypt = 'yes'
         self.trust_server_certificate = 'yes'
         self.tls_version = '1.1'
+        
+        # Report queries are read-only, so skip per-statement transaction handling
+        self.autocommit = True
+        # Query timeout in seconds (0 = wait indefinitely, the ODBC default)
+        self.query_timeout = int(os.getenv('MCP_DB_QUERY_TIMEOUT', '0'))
     
     def get_connection_string(self) -> str:
         """Generate ODBC connection string"""
@@ -47,6 +52,24 @@ class DatabaseConfig:
         )
 
 
+# Rows requested per ODBC fetch round-trip
+CURSOR_ARRAYSIZE = 10000
+
+# Upper bound on stored procedures executed in parallel (one connection each)
+MAX_FETCH_WORKERS = int(os.getenv('MCP_DB_MAX_WORKERS', '5'))
+
+# Idle connections kept open for reuse per connection string (0 disables pooling)
+CONNECTION_POOL_SIZE = int(os.getenv('MCP_DB_POOL_SIZE', '5'))
+
+# Worker processes used to write debug-mode stored procedure dumps (1, the default, writes them in-process)
+MAX_EXPORT_WORKERS = int(os.getenv('MCP_EXPORT_MAX_WORKERS', '1'))
+
+# File format for debug-mode stored procedure dumps: 'xlsx' or 'parquet' (requires pyarrow)
+DEBUG_EXPORT_FORMAT = os.getenv('MCP_DEBUG_EXPORT_FORMAT', 'xlsx').lower()
+
+# Print calculation breakdowns and top/bottom insights to the console (set to 0/false/no/off for quiet production runs)
+VERBOSE = os.getenv('MCP_VERBOSE', '1').strip().lower() not in ('0', 'false', 'no', 'off', '')
+
 STORED_PROCEDURES: Dict[str, str] = {
     'Revenue': 'exec Shakudo_DMRGetRevenue @database=?, @group_no=?, @date_ini=?, @date_end=?',
     'PayrollContract': 'exec Shakudo_DMRGetPayroll @resort=?, @date_ini=?, @date_end=?',
@@ -3,22 +3,116 @@ Database connection utilities for MCP Database
 Mountain Capital Partners - Ski Resort Data Analysis
 """
 
+import atexit
+import threading
 import pyodbc
-from typing import Optional
-from config import DatabaseConfig
+from typing import Dict, List, Optional
+from config import DatabaseConfig, CURSOR_ARRAYSIZE, CONNECTION_POOL_SIZE
+
+
+class ConnectionPool:
+    """Thread-safe pool of idle database connections keyed by connection string"""
+    
+    def __init__(self, max_idle: int = CONNECTION_POOL_SIZE):
+        """
+        Initialize connection pool
+        
+        Args:
+            max_idle: Maximum idle connections kept per connection string (0 disables pooling)
+        """
+        self.max_idle = max_idle
+        self._idle: Dict[str, List[pyodbc.Connection]] = {}
+        self._lock = threading.Lock()
+    
+    def acquire(self, config: DatabaseConfig) -> pyodbc.Connection:
+        """
+        Check out a live connection, reusing an idle one when available
+        
+        Args:
+            config: DatabaseConfig describing the target database
+            
+        Returns:
+            pyodbc.Connection: Active database connection
+        """
+        connection_string = config.get_connection_string()
+        while True:
+            with self._lock:
+                idle_connections = self._idle.get(connection_string)
+                conn = idle_connections.pop() if idle_connections else None
+            if conn is None:
+                break
+            if self._is_alive(conn):
+                return conn
+            self._discard(conn)
+        
+        conn = pyodbc.connect(connection_string, autocommit=config.autocommit)
+        conn.timeout = config.query_timeout
+        return conn
+    
+    def release(self, config: DatabaseConfig, conn: pyodbc.Connection) -> bool:
+        """
+        Return a connection to the pool, closing it if the pool is full
+        
+        Returns:
+            bool: True if the connection was kept for reuse, False if it was closed
+        """
+        connection_string = config.get_connection_string()
+        with self._lock:
+            idle_connections = self._idle.setdefault(connection_string, [])
+            if len(idle_connections) < self.max_idle:
+                idle_connections.append(conn)
+                return True
+        self._discard(conn)
+        return False
+    
+    def close_all(self):
+        """Close every idle connection held by the pool"""
+        with self._lock:
+            idle_connections = [conn for connections in self._idle.values() for conn in connections]
+            self._idle.clear()
+        for conn in idle_connections:
+            self._discard(conn)
+    
+    @staticmethod
+    def _is_alive(conn: pyodbc.Connection) -> bool:
+        """Check that an idle connection survived server-side idle timeouts"""
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except pyodbc.Error:
+            return False
+    
+    @staticmethod
+    def _discard(conn: pyodbc.Connection):
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+
+
+connection_pool = ConnectionPool()
+atexit.register(connection_pool.close_all)
 
 
 class DatabaseConnection:
     """Manages database connections and basic operations"""
     
-    def __init__(self, config: Optional[DatabaseConfig] = None):
+    def __init__(self, config: Optional[DatabaseConfig] = None, pool: Optional[ConnectionPool] = None,
+                 verbose: bool = True):
         """
         Initialize database connection manager
         
         Args:
             config: DatabaseConfig object. If None, uses default configuration.
+            pool: ConnectionPool to check connections out of. If None, uses the module-level pool.
+            verbose: Print connect/release status messages (errors are always printed)
         """
         self.config = config or DatabaseConfig()
+        self.pool = pool or connection_pool
+        self.verbose = verbose
         self.conn: Optional[pyodbc.Connection] = None
     
     def connect(self) -> pyodbc.Connection:
@@ -32,19 +126,31 @@ class DatabaseConnection:
             Exception: If connection fails
         """
         try:
-            connection_string = self.config.get_connection_string()
-            self.conn = pyodbc.connect(connection_string)
-            print("Connection successful!")
+            self.conn = self.pool.acquire(self.config)
+            if self.verbose:
+                print("Connection successful!")
             return self.conn
         except Exception as e:
             print(f"Error connecting to database: {e}")
             raise
     
-    def close(self):
-        """Close the database connection"""
+    def close(self, discard: bool = False):
+        """
+        Release the database connection back to the pool
+        
+        Args:
+            discard: If True, close the connection instead of pooling it
+        """
         if self.conn:
-            self.conn.close()
-            print("Connection closed.")
+            if not discard and self.pool.release(self.config, self.conn):
+                if self.verbose:
+                    print("Connection returned to pool.")
+            else:
+                if discard:
+                    ConnectionPool._discard(self.conn)
+                if self.verbose:
+                    print("Connection closed.")
+            self.conn = None
     
     def get_connection(self) -> pyodbc.Connection:
         """
@@ -57,13 +163,24 @@ class DatabaseConnection:
             return self.connect()
         return self.conn
     
+    def get_cursor(self) -> pyodbc.Cursor:
+        """
+        Get a cursor on the current connection, tuned for bulk fetches
+        
+        Returns:
+            pyodbc.Cursor: Cursor with arraysize set to CURSOR_ARRAYSIZE
+        """
+        cursor = self.get_connection().cursor()
+        cursor.arraysize = CURSOR_ARRAYSIZE
+        return cursor
+    
     def __enter__(self):
         """Context manager entry"""
         return self.connect()
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit"""
-        self.close()
+        """Context manager exit (connections that saw an error are not reused)"""
+        self.close(discard=exc_type is not None)
 
 
 def create_connection(username: Optional[str] = None, 
@@ -4,15 +4,26 @@ Mountain Capital Partners - Ski Resort Data Analysis
 """
 
 from datetime import datetime
-from analysis_engine import AnalysisEngine
-from config import RESORT_MAPPING
+from config import DatabaseConfig, RESORT_MAPPING
 
 
 def main(analysis_type: str = "both"):
     OUTPUT_DIR = "reports"
+    saved_files = {'reports': [], 'insights': []}
+    
+    # Fail fast on missing credentials before paying for the pandas/pyodbc imports
+    try:
+        DatabaseConfig()
+    except ValueError as e:
+        print(f"❌ {e}")
+        return saved_files
+    
+    from analysis_engine import AnalysisEngine
+    
     analysisEngine = AnalysisEngine(OUTPUT_DIR)
     resorts = RESORT_MAPPING
-    saved_files = {'reports': [], 'insights': []}
+    # One run date for the whole batch so every resort reports on the same ranges
+    run_date = datetime.now()
     
     print(f"Starting batch generation (analysis_type='{analysis_type}') for {len(resorts)} resorts...")
     
@@ -20,7 +31,7 @@ def main(analysis_type: str = "both"):
         try:
             result = analysisEngine.generate_analysis(
                 resort_config=resort_config,
-                run_date=datetime.now(),
+                run_date=run_date,
                 analysis_type=analysis_type
             )
             if result.get('report_path'):
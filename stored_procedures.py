@@ -3,11 +3,15 @@ Stored procedure execution utilities for MCP Database
 Mountain Capital Partners - Ski Resort Data Analysis
 """
 
+import queue
+import threading
 import pyodbc
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Tuple, Union
-from config import STORED_PROCEDURES
+from typing import Any, Callable, Dict, Hashable, List, Tuple, Union
+from config import STORED_PROCEDURES, CURSOR_ARRAYSIZE, MAX_FETCH_WORKERS
+from db_connection import DatabaseConnection
 from utils import pyodbc_rows_to_dataframe
 
 
@@ -24,6 +28,12 @@ class StoredProcedures:
         self.connection = connection
         self.procedures = STORED_PROCEDURES
     
+    def _cursor(self) -> pyodbc.Cursor:
+        """Create a cursor tuned for bulk fetches"""
+        cursor = self.connection.cursor()
+        cursor.arraysize = CURSOR_ARRAYSIZE
+        return cursor
+    
     def execute_revenue(self, 
                        database: str,
                        group_number: int,
@@ -33,7 +43,7 @@ class StoredProcedures:
         """
         Execute the Revenue stored procedure (Shakudo_DMRGetRevenue)
         """
-        cursor = self.connection.cursor()
+        cursor = self._cursor()
         cursor.execute(self.procedures['Revenue'], (database, group_number, date_start, date_end))
         
         if return_dataframe:
@@ -49,7 +59,7 @@ class StoredProcedures:
         """
         Execute the Payroll stored procedure (Shakudo_DMRGetPayroll)
         """
-        cursor = self.connection.cursor()
+        cursor = self._cursor()
         cursor.execute(self.procedures['PayrollContract'], (resort_name, date_start, date_end))
         
         if return_dataframe:
@@ -65,7 +75,7 @@ class StoredProcedures:
         """
         Execute the Salary Payroll stored procedure (Shakudo_DMRGetPayrollSalary)
         """
-        cursor = self.connection.cursor()
+        cursor = self._cursor()
         cursor.execute(self.procedures['PayrollSalaryActive'], (resort_name, date_start, date_end))
         
         if return_dataframe:
@@ -81,7 +91,7 @@ class StoredProcedures:
         """
         Execute the Budget stored procedure (Shakudo_DMRBudget)
         """
-        cursor = self.connection.cursor()
+        cursor = self._cursor()
         cursor.execute(self.procedures['Budget'], (resort_name, date_start, date_end))
         
         if return_dataframe:
@@ -97,7 +107,7 @@ class StoredProcedures:
         """
         Execute the Payroll History stored procedure (Shakudo_DMRGetPayrollHistory)
         """
-        cursor = self.connection.cursor()
+        cursor = self._cursor()
         cursor.execute(self.procedures['PayrollSalaryHistory'], (resort_name, date_start, date_end))
         
         if return_dataframe:
@@ -113,7 +123,7 @@ class StoredProcedures:
         """
         Execute the Visits stored procedure (Shakudo_DMRGetVists)
         """
-        cursor = self.connection.cursor()
+        cursor = self._cursor()
         cursor.execute(self.procedures['Visits'], (resort_name, date_start, date_end))
         
         if return_dataframe:
@@ -129,7 +139,7 @@ class StoredProcedures:
         """
         Execute the Weather/Snow stored procedure (Shakudo_GetSnow)
         """
-        cursor = self.connection.cursor()
+        cursor = self._cursor()
         cursor.execute(self.procedures['Weather'], (resort_name, date_start, date_end))
         
         if return_dataframe:
@@ -144,7 +154,7 @@ class StoredProcedures:
         """
         Execute a custom stored procedure
         """
-        cursor = self.connection.cursor()
+        cursor = self._cursor()
         cursor.execute(procedure_name, parameters)
         
         if return_dataframe:
@@ -184,3 +194,56 @@ def execute_weather_proc(connection: pyodbc.Connection,
                         date_end: Union[datetime, str]) -> pd.DataFrame:
     stored_procedures = StoredProcedures(connection)
     return stored_procedures.execute_weather(resort_name, date_start, date_end)
+
+
+def fetch_concurrently(fetch_tasks: Dict[Hashable, Callable[['StoredProcedures'], Any]],
+                       max_workers: int = MAX_FETCH_WORKERS) -> Dict[Hashable, Any]:
+    """
+    Run independent stored procedure calls in parallel
+    
+    pyodbc connections cannot be shared between threads, so each worker opens
+    its own connection and pulls tasks from a shared queue until it is empty.
+    The first failing call or connection stops every worker from starting
+    another task, and its exception is re-raised once in-flight calls finish.
+    
+    Args:
+        fetch_tasks: Mapping of result key to a callable taking a StoredProcedures handler
+        max_workers: Maximum number of worker threads (and connections)
+        
+    Returns:
+        Dict mapping each task key to the value returned by its callable
+    """
+    if not fetch_tasks:
+        return {}
+    
+    pending_tasks = queue.Queue()
+    for task in fetch_tasks.items():
+        pending_tasks.put(task)
+    
+    failed = threading.Event()
+    
+    def run_worker() -> Dict[Hashable, Any]:
+        fetched = {}
+        if failed.is_set():
+            return fetched
+        try:
+            with DatabaseConnection(verbose=False) as conn:
+                stored_procedures = StoredProcedures(conn)
+                while not failed.is_set():
+                    try:
+                        key, fetch = pending_tasks.get_nowait()
+                    except queue.Empty:
+                        break
+                    fetched[key] = fetch(stored_procedures)
+        except BaseException:
+            failed.set()
+            raise
+        return fetched
+    
+    worker_count = max(1, min(max_workers, len(fetch_tasks)))
+    results = {}
+    with ThreadPoolExecutor(max_workers=worker_count) as executor:
+        futures = [executor.submit(run_worker) for _ in range(worker_count)]
+        for future in futures:
+            results.update(future.result())
+    return {key: results[key] for key in fetch_tasks}
@@ -0,0 +1,65 @@
+"""
+Tests for missing department code handling
+Mountain Capital Partners - Ski Resort Data Analysis
+"""
+
+import pandas as pd
+import pytest
+
+from analysis_engine import AnalysisEngine
+from utils import ARROW_STRING_DTYPE, DataUtils, pyodbc_rows_to_dataframe
+
+
+CODE_DTYPES = [
+    pytest.param(object, id="object"),
+    pytest.param(ARROW_STRING_DTYPE, id="arrow",
+                 marks=pytest.mark.skipif(ARROW_STRING_DTYPE is None, reason="pyarrow not installed")),
+]
+
+
+class FakeCursor:
+    """Minimal stand-in for a pyodbc cursor over a fixed result set"""
+
+    def __init__(self, column_names, rows):
+        self.description = [(name,) for name in column_names]
+        self._rows = list(rows)
+
+    def fetchmany(self, size):
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        return batch
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return AnalysisEngine(str(tmp_path), verbose=False)
+
+
+@pytest.mark.parametrize("dtype", CODE_DTYPES)
+def test_trim_dept_codes_maps_missing_to_empty(dtype):
+    codes = pd.Series([" 100 ", None, "200"], dtype=dtype)
+    assert DataUtils.trim_dept_codes(codes).tolist() == ["100", "", "200"]
+
+
+@pytest.mark.parametrize("dtype", CODE_DTYPES)
+def test_null_codes_yield_no_department(engine, dtype):
+    salary_df = pd.DataFrame({
+        'department': pd.Series([None, "100", None], dtype=dtype),
+        'total': [515.56, 10.0, 1504.34],
+    })
+    contract_df = pd.DataFrame({
+        'department': pd.Series([None, None], dtype=dtype),
+        'rate': [20.0, 25.0],
+        'hours': [8.0, 4.0],
+    })
+    all_departments = set()
+    salary_totals = engine._sum_salary_totals(salary_df, {})
+    contract_wages, _ = engine._calculate_contract_wages(contract_df, {}, all_departments)
+    assert salary_totals == {"100": 10.0}
+    assert contract_wages == {}
+    assert all_departments == set()
+
+
+def test_null_codes_from_cursor_yield_no_department(engine):
+    cursor = FakeCursor(['department', 'total'], [(None, 515.56), (" 100", 10.0), (None, 1504.34)])
+    salary_df = pyodbc_rows_to_dataframe(cursor)
+    assert engine._sum_salary_totals(salary_df, {}) == {"100": 10.0}
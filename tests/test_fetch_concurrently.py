@@ -0,0 +1,49 @@
+"""
+Tests for parallel stored procedure fetching
+Mountain Capital Partners - Ski Resort Data Analysis
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+import stored_procedures
+from stored_procedures import fetch_concurrently
+
+
+@pytest.fixture(autouse=True)
+def fake_connection(monkeypatch):
+    @contextmanager
+    def connection(verbose=True):
+        yield object()
+    monkeypatch.setattr(stored_procedures, "DatabaseConnection", connection)
+
+
+def test_results_keep_task_order():
+    tasks = {key: (lambda sp, k=key: k * 2) for key in range(10)}
+    assert list(fetch_concurrently(tasks, max_workers=3).items()) == [(key, key * 2) for key in range(10)]
+
+
+def test_first_failure_stops_remaining_tasks():
+    calls = []
+    calls_lock = threading.Lock()
+    failing = threading.Event()
+
+    def fetch(sp, key):
+        with calls_lock:
+            calls.append(key)
+        if key == 0:
+            failing.set()
+            raise RuntimeError("stored procedure failed")
+        # Keep the other workers busy until the failure has been recorded
+        failing.wait(timeout=1)
+        time.sleep(0.05)
+        return key
+
+    tasks = {key: (lambda sp, k=key: fetch(sp, k)) for key in range(30)}
+    with pytest.raises(RuntimeError, match="stored procedure failed"):
+        fetch_concurrently(tasks, max_workers=3)
+    # Only the failing call and at most one in-flight call per other worker ran
+    assert len(calls) <= 3
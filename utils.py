@@ -6,27 +6,69 @@ Mountain Capital Partners - Ski Resort Data Analysis
 import math
 import pandas as pd
 import pyodbc
-from typing import Tuple, Dict, Any, Union, List
+from typing import Tuple, Dict, Any, Union, List, Optional
 from datetime import datetime, timedelta
 
+from config import CURSOR_ARRAYSIZE
+
+
+def _arrow_string_dtype() -> Optional[pd.StringDtype]:
+    """Arrow-backed string dtype with NaN for missing values, or None if unavailable"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    try:
+        return pd.StringDtype('pyarrow', na_value=math.nan)
+    except TypeError:
+        try:
+            return pd.StringDtype('pyarrow_numpy')
+        except (TypeError, ValueError):
+            return None
+
+
+# Resolved once at import; pandas 3 already infers this dtype for string columns
+ARROW_STRING_DTYPE = _arrow_string_dtype()
+
 
 def pyodbc_rows_to_dataframe(cursor: pyodbc.Cursor) -> pd.DataFrame:
     """
     Convert pyodbc cursor results to a pandas DataFrame
     
+    Rows are streamed in batches of CURSOR_ARRAYSIZE and transposed into
+    per-column lists as they arrive, so neither the pyodbc rows nor per-row
+    tuples are held for the whole result set. When pyarrow is installed,
+    text columns are stored as Arrow-backed strings so department-code
+    groupbys run on Arrow kernels instead of Python objects.
+    
     Args:
         cursor: pyodbc cursor with executed query
         
     Returns:
         pd.DataFrame: Query results as DataFrame
     """
-    rows = cursor.fetchall()
-    if not rows:
+    column_values = None
+    while True:
+        rows = cursor.fetchmany(CURSOR_ARRAYSIZE)
+        if not rows:
+            break
+        if column_values is None:
+            column_values = [[] for _ in cursor.description]
+        for values, batch_values in zip(column_values, zip(*rows)):
+            values.extend(batch_values)
+    if column_values is None:
         return pd.DataFrame()
     
     column_names = [column_info[0] for column_info in cursor.description]
-    row_data = [tuple(row) for row in rows]
-    return pd.DataFrame(row_data, columns=column_names)
+    # Build from positional keys so duplicate column names survive
+    dataframe = pd.DataFrame(dict(enumerate(column_values)))
+    dataframe.columns = column_names
+    if ARROW_STRING_DTYPE is not None:
+        for position, values in enumerate(column_values):
+            column = dataframe.iloc[:, position]
+            if column.dtype == object and pd.api.types.infer_dtype(values, skipna=True) == 'string':
+                dataframe.isetitem(position, column.astype(ARROW_STRING_DTYPE))
+    return dataframe
 
 
 class DataUtils:
@@ -45,13 +87,35 @@ class DataUtils:
         except (TypeError, ValueError):
             return 0.0
 
+    @staticmethod
+    def normalize_series(series: pd.Series) -> pd.Series:
+        """Vectorized normalize_value: float64 Series with None, NaN, Inf and non-numeric values as 0.0"""
+        values = pd.to_numeric(series, errors='coerce').astype('float64')
+        return values.replace([math.inf, -math.inf], 0.0).fillna(0.0)
+
+    @staticmethod
+    def to_datetime_series(series: pd.Series) -> pd.Series:
+        """Parse punch times to datetime64 (NaT when unparseable), skipping columns that already are"""
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        parsed = pd.to_datetime(series, format='ISO8601', errors='coerce')
+        # Non-ISO text comes back as NaT under the fixed format; re-parse those columns value by value
+        if (parsed.isna() & series.notna()).any():
+            parsed = pd.to_datetime(series, format='mixed', errors='coerce')
+        return parsed
+
     @staticmethod
     def trim_dept_code(code: Any) -> str:
-        """Trim whitespace from department code for consistent matching"""
-        if code is None:
+        """Trim whitespace from department code for consistent matching ("" for missing codes)"""
+        if pd.isna(code):
             return ""
         return str(code).strip()
 
+    @staticmethod
+    def trim_dept_codes(codes: pd.Series) -> pd.Series:
+        """Vectorized trim_dept_code: every missing code (None, NaN, NA) becomes "" whatever the column dtype"""
+        return codes.astype(str).str.strip().where(codes.notna(), "")
+
     @staticmethod
     def get_col(dataframe: pd.DataFrame, candidates: List[str]) -> Union[str, None]:
         """Find first matching column from a list of candidates"""
@@ -90,6 +154,60 @@ class DataUtils:
             name = name.replace(char, '_')
         return name.strip('. ')
 
+    @staticmethod
+    def categorize_strings(dataframe: pd.DataFrame, category_ratio: float = 0.5) -> pd.DataFrame:
+        """
+        Return a shallow copy of a DataFrame with repetitive string columns as categoricals
+        
+        Args:
+            dataframe: DataFrame to convert
+            category_ratio: Maximum unique/total ratio for a string column to become categorical
+        
+        Returns:
+            Copy of the DataFrame sharing the unconverted columns
+        """
+        converted = dataframe.copy(deep=False)
+        row_count = len(converted)
+        if row_count == 0:
+            return converted
+        for column in converted.select_dtypes(include=['object', 'string']).columns:
+            values = converted[column]
+            if pd.api.types.infer_dtype(values, skipna=True) != 'string':
+                continue
+            if values.nunique(dropna=True) / row_count < category_ratio:
+                converted[column] = values.astype('category')
+        return converted
+
+    @staticmethod
+    def downcast_dataframe(dataframe: pd.DataFrame, category_ratio: float = 0.5) -> pd.DataFrame:
+        """
+        Return a copy of a DataFrame with compact dtypes for columnar export
+        
+        String columns whose distinct-value ratio is below category_ratio
+        (department codes, titles, locations) are stored as categoricals.
+        Integer columns are shrunk to the smallest integer type that holds
+        them, and float columns only when float32 round-trips every value
+        exactly, so monetary amounts never lose precision.
+        
+        Args:
+            dataframe: DataFrame to downcast
+            category_ratio: Maximum unique/total ratio for a string column to become categorical
+        
+        Returns:
+            Downcast copy of the DataFrame
+        """
+        if dataframe.empty:
+            return dataframe
+        downcast = DataUtils.categorize_strings(dataframe, category_ratio)
+        for column in downcast.select_dtypes(include=['integer']).columns:
+            downcast[column] = pd.to_numeric(downcast[column], downcast='integer')
+        for column in downcast.select_dtypes(include=['floating']).columns:
+            values = downcast[column]
+            shrunk = pd.to_numeric(values, downcast='float')
+            if shrunk.dtype != values.dtype and shrunk.astype(values.dtype).equals(values):
+                downcast[column] = shrunk
+        return downcast
+
     @staticmethod
     def calculate_variance_percentage(baseline: float, actual: float) -> float:
         """Calculate variance percentage between baseline and actual values."""
@@ -125,9 +243,10 @@ class DateRangeCalculator:
                            If False and use_exact_date=True, uses run_date exactly as base.
             use_exact_date: If True, uses run_date exactly without subtracting 1 day (for past dates)
         """
-        self.run_date = run_date or datetime.now()
+        now = datetime.now()
+        self.run_date = run_date or now
         self.is_current_date = is_current_date
-        self.current_time = datetime.now() if is_current_date else None
+        self.current_time = now if is_current_date else None
         
         if is_current_date:
             self.base_date = self.run_date
@@ -137,8 +256,22 @@ class DateRangeCalculator:
             self.base_date = self.run_date - timedelta(days=1)
             self.base_date = self.base_date.replace(hour=23, minute=59, second=59, microsecond=0)
         
+        # Calendar parts shared by the range methods. 52 weeks back lands on the
+        # same weekday, so _weekday also applies to _prior_week_date.
+        self._weekday = self.base_date.weekday()
+        self._year = self.base_date.year
+        self._month = self.base_date.month
+        self._prior_week_date = self.base_date - timedelta(weeks=52)
+        
+        self._all_ranges: Optional[Dict[str, Tuple[datetime, datetime]]] = None
+        
     def get_all_ranges(self) -> Dict[str, Tuple[datetime, datetime]]:
-        """Get all 9 required date ranges"""
+        """Get all 9 required date ranges (computed once per calculator)"""
+        if self._all_ranges is None:
+            self._all_ranges = self._compute_all_ranges()
+        return dict(self._all_ranges)
+
+    def _compute_all_ranges(self) -> Dict[str, Tuple[datetime, datetime]]:
         return {
             "For The Day (Actual)": self.for_the_day_actual(),
             "For The Day (Prior Year)": self.for_the_day_prior_year(),
@@ -162,15 +295,14 @@ class DateRangeCalculator:
 
     def for_the_day_prior_year(self) -> Tuple[datetime, datetime]:
         """Same day of week last year (Go back 52 weeks to align day of week)"""
-        prior_date = self.base_date - timedelta(weeks=52)
+        prior_date = self._prior_week_date
         range_start = prior_date.replace(hour=0, minute=0, second=0, microsecond=0)
         range_end = prior_date
         return range_start, range_end
 
     def week_ending_actual(self) -> Tuple[datetime, datetime]:
         """Monday of current week to For The Day (or current time if current date)"""
-        days_since_monday = self.base_date.weekday()
-        range_start = (self.base_date - timedelta(days=days_since_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
+        range_start = (self.base_date - timedelta(days=self._weekday)).replace(hour=0, minute=0, second=0, microsecond=0)
         if self.is_current_date and self.current_time:
             range_end = self.current_time
         else:
@@ -179,24 +311,21 @@ class DateRangeCalculator:
 
     def week_ending_prior_year(self) -> Tuple[datetime, datetime]:
         """Monday of prior year week to For The Day Prior Year"""
-        prior_end_date = (self.base_date - timedelta(weeks=52))
-        days_since_monday = prior_end_date.weekday()
-        range_start = (prior_end_date - timedelta(days=days_since_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
+        prior_end_date = self._prior_week_date
+        range_start = (prior_end_date - timedelta(days=self._weekday)).replace(hour=0, minute=0, second=0, microsecond=0)
         return range_start, prior_end_date
 
     def week_total_prior_year(self) -> Tuple[datetime, datetime]:
         """Monday 00:00:00 to Sunday 23:59:59 of prior year week"""
-        prior_date = (self.base_date - timedelta(weeks=52))
-        days_since_monday = prior_date.weekday()
-        range_start = (prior_date - timedelta(days=days_since_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
+        prior_date = self._prior_week_date
+        range_start = (prior_date - timedelta(days=self._weekday)).replace(hour=0, minute=0, second=0, microsecond=0)
         range_end = (range_start + timedelta(days=6)).replace(hour=23, minute=59, second=59, microsecond=0)
         
         return range_start, range_end
 
     def week_total_actual(self) -> Tuple[datetime, datetime]:
         """Monday 00:00:00 to Sunday 23:59:59 of current week"""
-        days_since_monday = self.base_date.weekday()
-        range_start = (self.base_date - timedelta(days=days_since_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
+        range_start = (self.base_date - timedelta(days=self._weekday)).replace(hour=0, minute=0, second=0, microsecond=0)
         range_end = (range_start + timedelta(days=6)).replace(hour=23, minute=59, second=59, microsecond=0)
         
         return range_start, range_end
@@ -212,7 +341,7 @@ class DateRangeCalculator:
 
     def month_to_date_prior_year(self) -> Tuple[datetime, datetime]:
         """First day of same month prior year to same date prior year"""
-        prior_year = self.base_date.year - 1
+        prior_year = self._year - 1
         try:
             prior_end_date = self.base_date.replace(year=prior_year)
         except ValueError:
@@ -223,12 +352,10 @@ class DateRangeCalculator:
 
     def winter_ending_actual(self) -> Tuple[datetime, datetime]:
         """Nov 1 of current season to For The Day (or current time if current date)"""
-        current_month = self.base_date.month
-        current_year = self.base_date.year
-        if current_month >= 11:
-            season_start_year = current_year
+        if self._month >= 11:
+            season_start_year = self._year
         else:
-            season_start_year = current_year - 1
+            season_start_year = self._year - 1
         range_start = datetime(season_start_year, 11, 1, 0, 0, 0)
         if self.is_current_date and self.current_time:
             range_end = self.current_time
@@ -238,14 +365,13 @@ class DateRangeCalculator:
 
     def winter_ending_prior_year(self) -> Tuple[datetime, datetime]:
         """Nov 1 of prior season to Same Date last year (Date aligned, not DOW)"""
-        prior_date_year = self.base_date.year - 1
+        prior_date_year = self._year - 1
         try:
             range_end = self.base_date.replace(year=prior_date_year)
         except ValueError:
             range_end = self.base_date.replace(year=prior_date_year, day=28)
         
-        current_month = self.base_date.month
-        if current_month >= 11:
+        if self._month >= 11:
             season_start_year = prior_date_year
         else:
             season_start_year = prior_date_year - 1